@@ -1,7 +1,6 @@
 import discord
 from discord import Embed, Option
 from discord.ext.commands import Bot
-import asyncio
 import logging
 from logging.handlers import RotatingFileHandler
 import re
@@ -27,8 +26,21 @@ log = logging.getLogger("main")
 debug_guilds = config.debug_guilds if config.dev else None
 game_names = list(vrml.short_game_names.keys())
 
+vrml.http.use_disk_cache("data/http_cache")
 
-bot = Bot(debug_guilds=debug_guilds)
+# Seconds a command has to respond before Discord gives up on it, minus
+# some slack. Deferring buys a lot more time.
+ACK_BUDGET = 2.5
+DEFERRED_BUDGET = 60
+
+
+class VRMLBot(Bot):
+    async def close(self):
+        await vrml.http.close()
+        await super().close()
+
+
+bot = VRMLBot(debug_guilds=debug_guilds)
 admin_actions = lib.AdminActions(bot)
 
 def init():
@@ -36,8 +48,25 @@ def init():
     lib.start_tasks()
 
 
+async def defer(ctx):
+    "Defer the response and extend the command's deadline accordingly."
+    await ctx.defer()
+    d = vrml.http.current_deadline.get()
+    if d is not None:
+        d.extend(DEFERRED_BUDGET)
+
+
+@bot.before_invoke
+async def prepare_requests(ctx):
+    # stop waiting on VRML once nobody will see the answer anymore
+    vrml.http.current_deadline.set(vrml.http.Deadline(ACK_BUDGET))
+    # share the API fairly between servers
+    vrml.http.current_guild.set(ctx.guild_id)
+
+
 @bot.event
 async def on_ready():
+    await vrml.http.start()
     init()
     log.info("Bot initialized and logged in.")
 
@@ -118,7 +147,16 @@ async def on_application_command_error(ctx, exc):
     log.exception(f"{original.__class__.__name__}: {original}", 
                   exc_info=original)
     
-    if isinstance(original, vrml.http.HTTPServiceUnavailable):
+    if isinstance(original, vrml.http.DeadlineExceeded):
+        try:
+            await ctx.respond(
+                "VRML took too long to answer. Please try again later.",
+                ephemeral=True)
+        except discord.HTTPException:
+            # the interaction expired already
+            log.info(f"{ctx.guild_id}: Could not respond, interaction "
+                     "has expired.")
+    elif isinstance(original, vrml.http.HTTPUnavailable):
         await ctx.respond(
             "VRML is not responding. This can happen during match "
             "generation. Please try again later. \nIf the issue persists, "
@@ -182,6 +220,11 @@ async def on_message(msg: discord.Message):
             s += f"{k}: {v}\n"
         await msg.channel.send(s[:2000])
 
+    if cmd == "!http_stats":
+        s = await admin_actions.http_stats()
+        for i in range(0, len(s), 1990):
+            await msg.channel.send(f"```\n{s[i:i+1990]}```")
+
     if cmd == "!log":
         try:
             file = await admin_actions.log(content)
@@ -194,6 +237,10 @@ async def on_message(msg: discord.Message):
         await admin_actions.update_discord_players()
         await msg.channel.send("Finished updating discord_players")
 
+    if cmd == "!clear_misses":
+        count = await admin_actions.clear_misses()
+        await msg.channel.send(f"Forgot {count} empty VRML response(s).")
+
 
 @bot.slash_command()
 async def about(ctx):
@@ -257,7 +304,7 @@ async def game(ctx,
         return
     
     game: vrml.Game = await vrml.get_game(game)
-    await ctx.respond(embed = game.get_embed())
+    await ctx.respond(embed = lib.game_embed(game))
 
 
 @bot.slash_command()
@@ -265,7 +312,7 @@ async def player(ctx,
                  name: Option(str, "Name of the player or @ a member"),
                  game: Option(str, "Name of the game/league to search, all leagues are searched if omitted.", choices=["Any"]+game_names)=None):
     """Search for an active player."""
-    await ctx.defer()   # buying some time
+    await defer(ctx)    # buying some time
 
     game = game or lib.get_guild(ctx.guild_id).default_game
     if game == "Any":
@@ -282,12 +329,12 @@ async def player(ctx,
     
     if exact_players:
         tasks = [bot.loop.create_task(p.fetch()) for p in exact_players]
-        exact_players = await asyncio.gather(*tasks)
+        exact_players = await vrml.http.gather(*tasks)
         if game is not None:
             exact_players = list(filter(lambda p: p.game.name == game, 
                                         exact_players))
         if exact_players:
-            await ctx.respond(embeds=[p.get_embed() for p in exact_players])
+            await ctx.respond(embeds=[lib.player_embed(p) for p in exact_players])
             return
     
     if len(players) > 30:
@@ -304,7 +351,7 @@ async def player(ctx,
                           ephemeral=True)
     fetch_tasks = [bot.loop.create_task(player.fetch()) 
                    for player in players]
-    players = await asyncio.gather(*fetch_tasks)
+    players = await vrml.http.gather(*fetch_tasks)
 
     if game is not None:
         players = list(filter(lambda p:p.game.name == game, players))
@@ -318,7 +365,7 @@ async def player(ctx,
             "More then 10 players found. Please be more specific.\n"
             f"Found players: {', '.join(p.name for p in players)}")
         return
-    await ctx.respond(embeds=[p.get_embed() for p in players])
+    await ctx.respond(embeds=[lib.player_embed(p) for p in players])
     
 
 @bot.slash_command()
@@ -334,7 +381,7 @@ async def team(ctx,
         id = match.group(1)
         teams = lib.PlayerCache().get_teams_from_discord_id(id)
         exact_team = None
-        await ctx.defer() # buying time
+        await defer(ctx)  # buying time
     else:
         # search team by name
         game = game or lib.get_guild(ctx.guild_id).default_game
@@ -345,7 +392,7 @@ async def team(ctx,
                 ephemeral=True)
             return
         
-        await ctx.defer()   # buying time
+        await defer(ctx)    # buying time
         game = await vrml.get_game(game)
         teams = await game.search_team(name)
         exact_team = next(filter(lambda t: t.name.lower() == name.lower(), teams), None)
@@ -356,7 +403,7 @@ async def team(ctx,
     
     if exact_team is not None:
         team = await exact_team.fetch()
-        await ctx.respond(embed=team.get_embed(match_links, vod_links))
+        await ctx.respond(embed=lib.team_embed(team, match_links, vod_links))
     else:
         if len(teams) > 10:
             s = "More than 10 teams found. Please be more specific.\n" \
@@ -368,8 +415,8 @@ async def team(ctx,
             return
         
         tasks = [bot.loop.create_task(t.fetch()) for t in teams]
-        teams = await asyncio.gather(*tasks)
-        await ctx.respond(embeds=[t.get_embed(match_links, vod_links)
+        teams = await vrml.http.gather(*tasks)
+        await ctx.respond(embeds=[lib.team_embed(t, match_links, vod_links)
                                   for t in teams])
 
 
@@ -378,8 +425,8 @@ async def vrml_player(ctx, member):
     game = lib.get_guild(ctx.guild_id).default_game
     cache = lib.PlayerCache()
     players = cache.get_players_from_discord_id(member.id, game)
-    players = await asyncio.gather(*[p.fetch() for p in players])
-    embeds = [p.get_embed() for p in players]
+    players = await vrml.http.gather(*[p.fetch() for p in players])
+    embeds = [lib.player_embed(p) for p in players]
     if embeds:
         await ctx.respond("", embeds=embeds, ephemeral=True)
     else:
@@ -391,8 +438,8 @@ async def vrml_team(ctx, member):
     game = lib.get_guild(ctx.guild_id).default_game
     cache = lib.PlayerCache()
     teams = cache.get_teams_from_discord_id(member.id, game)
-    teams = await asyncio.gather(*[t.fetch() for t in teams])
-    embeds = [t.get_embed() for t in teams]
+    teams = await vrml.http.gather(*[t.fetch() for t in teams])
+    embeds = [lib.team_embed(t) for t in teams]
     if embeds:
         await ctx.respond("", embeds=embeds, ephemeral=True)
     else:
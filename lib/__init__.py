@@ -1,6 +1,7 @@
 from .utils import *
 from .admin_actions import *
 from .config import *
+from .embeds import *
 from .guild import *
 from .player_cache import *
 from .tasks import *
@@ -1,7 +1,9 @@
 import asyncio
 import discord
+import vrml
 from .tasks import fetch_vrml_discord_player
 from .guild import get_guild
+from .embeds import renders
 
 __all__ = [
     "AdminActions",
@@ -19,8 +21,10 @@ class AdminActions:
              "!msg_owners    Message all server owners\n"
              "!msg_both      Message server owners and system channels in all servers\n"
              "!stats         Send bot stats\n"
+             "!http_stats    Send VRML API request metrics per endpoint\n"
              "!log           Send log file, 1-4 may be specified for log history\n"
              "!update_cache  Update cached data from VRML\n"
+             "!clear_misses  Forget VRML requests that came back empty\n"
              "```")
         return s
     
@@ -71,11 +75,61 @@ class AdminActions:
         return tuple(counts)
 
     async def stats(self):
+        cache = vrml.http.cache.stats()
+        search = vrml.http.search_cache.stats()
+        negative = vrml.http.negative_cache.stats()
+        shared = [m.stats() for m in (vrml.identity.seasons,
+                                      vrml.identity.partial_teams,
+                                      vrml.identity.partial_games)]
+        rendered = renders.stats()
         return {
             "No. Servers": len(self.bot.guilds),
-            "Server names": [g.name for g in self.bot.guilds]
+            "Server names": [g.name for g in self.bot.guilds],
+            "API cache": (f"{cache['entries']} entries, {cache['hits']} hits, "
+                          f"{cache['misses']} misses, "
+                          f"{cache['evictions']} evictions"),
+            "Search cache": (f"{search['entries']} searches, "
+                             f"{search['hits']} hits, "
+                             f"{search['narrowed']} narrowed, "
+                             f"{search['misses']} misses"),
+            "Negative cache": (f"{negative['entries']} entries, "
+                               f"{negative['hits']} hits, "
+                               f"{negative['added']} added, "
+                               f"{negative['invalidated']} invalidated"),
+            "Shared entities": (
+                f"{sum(s['entries'] for s in shared)} entries, "
+                f"{sum(s['hits'] for s in shared)} reused, "
+                f"{sum(s['updates'] for s in shared)} updated, "
+                f"{sum(s['misses'] for s in shared)} decoded"),
+            "Rendered embeds": (f"{rendered['entries']} entries, "
+                                f"{rendered['hits']} hits, "
+                                f"{rendered['misses']} misses"),
         }
 
+    async def clear_misses(self):
+        """Forget about requests to the VRML API that came back empty, so
+        they are sent again.
+
+        Returns:
+            int: Number of forgotten requests.
+        """
+        return vrml.http.negative_cache.invalidate()
+
+    async def http_stats(self):
+        """Metrics of the requests to the VRML API per endpoint.
+
+        Returns:
+            str: Metrics as plain text.
+        """
+        refresh = vrml.http.popularity.stats()
+        limits = "\n".join(l.format()
+                           for l in vrml.http.limiters.values())
+        return (f"{vrml.http.metrics.format()}\n\n"
+                f"Request queues\n{vrml.http.scheduler.format()}\n\n"
+                f"Bulk job limits\n{limits or 'No bulk jobs yet.'}\n\n"
+                f"Refreshes of popular responses: {refresh['refreshes']}, "
+                f"misses saved: {refresh['saved']}")
+
     async def log(self, i=""):
         """Retriev log file in discord file format.
 
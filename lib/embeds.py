@@ -0,0 +1,265 @@
+from collections import OrderedDict
+from time import time as _now
+from discord import Embed
+
+__all__ = [
+    "dc_escape",
+    "stale_note",
+    "match_line",
+    "RenderCache",
+    "renders",
+    "game_embed",
+    "player_embed",
+    "team_embed",
+]
+
+
+_DC_ESCAPES = str.maketrans({"*": r"\*",
+                              "_": r"\_",
+                              "`": r"\`",
+                              "<": r"\<",
+                              ">": r"\>",
+                              "|": r"\|",
+                              "~": r"\~"})
+
+
+def dc_escape(string: str):
+    "Return the string with all Discord message formatting characters escaped."
+    if string is None:
+        string = ""
+    return string.translate(_DC_ESCAPES)
+
+
+def stale_note(fetched_at):
+    """Return a note for embed footers that the data was fetched at UNIX
+    time `fetched_at` and may be outdated."""
+    age = max(0, _now() - fetched_at)
+    if age < 60 * 60:
+        ago = f"{age // 60:.0f} min"
+    elif age < 24 * 60 * 60:
+        ago = f"{age // (60 * 60):.0f} h"
+    else:
+        ago = f"{age // (24 * 60 * 60):.0f} days"
+    return f"\u26a0 Data from {ago} ago, may be outdated"
+
+
+def match_line(match, team_id, match_link=False, vod_link=True):
+    """Line of a `vrml.Match` in a list of the team `team_id`'s matches,
+    ordered to put that team first."""
+    line = []
+    if match.is_scheduled:
+        line.append(f"<t:{int(match.date_scheduled.timestamp())}:d>")
+    else:
+        line.append(f"TBD")
+
+    if match.scores_submitted:
+        if team_id == match.home_team.id:
+            line.append(match.home_team.name)
+            line.append(f"{match.home_score}-{match.away_score}")
+            line.append(match.away_team.name)
+        elif team_id == match.away_team.id:
+            line.append(match.away_team.name)
+            line.append(f"{match.away_score}-{match.home_score}")
+            line.append(match.home_team.name)
+        else:
+            line.append("*error*")
+    else:
+        if team_id == match.home_team.id:
+            line.append(f"{match.home_team.name} - {match.away_team.name}")
+        elif team_id == match.away_team.id:
+            line.append(f"{match.away_team.name} - {match.home_team.name}")
+        else:
+            line.append("*error*")
+
+    links = ""
+    if match_link:
+        links += f'[[match]]({match.url} "Match page")'
+    if vod_link and match.vod_url:
+        links += f' [[VOD]]({match.vod_url} "Match VOD")'
+    line.append(links)
+
+    return " ".join(line)
+
+
+class RenderCache:
+    """Keeps rendered embeds, so the same view of the same data is only
+    rendered once, whichever server asks for it.
+
+    Embeds are keyed by the entity's ID and `version` (which changes with
+    its data), the render options and the outdated data note, if any. At
+    most `max_size` embeds are kept, least recently used ones are dropped.
+
+    Cached embeds are shared and must not be modified by their users.
+    """
+    def __init__(self, max_size=500) -> None:
+        self.max_size = max_size
+        self._embeds = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._embeds)
+
+    def get(self, render, obj, *options):
+        "Return `render(obj, *options)`, rendered earlier if possible."
+        note = None if obj.cached_at is None else stale_note(obj.cached_at)
+        key = (render.__name__, obj.id, obj.version, options, note)
+        embed = self._embeds.get(key, None)
+        if embed is not None:
+            self.hits += 1
+            self._embeds.move_to_end(key)
+            return embed
+        self.misses += 1
+        embed = render(obj, *options)
+        self._embeds[key] = embed
+        while len(self._embeds) > self.max_size:
+            self._embeds.popitem(last=False)
+        return embed
+
+    def clear(self):
+        self._embeds.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._embeds),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+renders = RenderCache()
+
+
+def game_embed(game):
+    "Return a `discord.Embed` object with details of the `vrml.Game`."
+    return renders.get(_game_embed, game)
+
+
+def player_embed(player):
+    "Return a `discord.Embed` object with details of the `vrml.Player`."
+    return renders.get(_player_embed, player)
+
+
+def team_embed(team, match_links=False, vod_links=True):
+    "Return a `discord.Embed` object with details of the `vrml.Team`."
+    return renders.get(_team_embed, team, match_links, vod_links)
+
+
+def _game_embed(game):
+    e = Embed(title=game.name,
+              url=game.url)
+    d = f"Current season: {game.current_season.name}"
+    e.description = d
+
+    s = (f"[Discord]({game.discord_invite_url})\n"
+         f"[YouTube]({game.youtube})\n"
+         f"[Twitter]({game.twitter})\n"
+         f"[Reddit]({game.reddit})\n"
+         f"[Facebook]({game.facebook})")
+    e.add_field(name="Socials", value=s, inline=False)
+
+    lines = (f'<t:{int(n.date_submitted.timestamp())}:d> [{n.title}]({n.url})'
+             for n in game.news_posts)
+    block = ""
+    for line in lines:
+        new_block = "\n".join([block, line])
+        if len(new_block) > 1024:
+            break
+        block = new_block
+    e.add_field(
+        name="Recent news posts",
+        value=block or "No recent posts.",
+        inline=False)
+    e.set_image(url=game.header_image_url)
+    if game.cached_at is not None:
+        e.set_footer(text=stale_note(game.cached_at))
+    return e
+
+
+def _player_embed(player):
+    e = Embed(title=dc_escape(player.name),
+              url=player.url)
+    d = (f"Team: {player.team.name if player.team else '*not on a team*'}\n"
+         f"Discord handle: `{player.user.discord_tag or 'Unlinked'}`\n"
+         f"Plays from: {player.user.country or 'Not specified'}\n"
+         f"Nationality: {player.user.nationality or 'Not specified'}\n")
+    if player.user.stream_url:
+        d += f"[Stream]({player.user.stream_url})\n"
+    if player.bio_current.honours_mention:
+        d += f"**{player.bio_current.honours_mention}**"
+    e.description = d
+    e.set_thumbnail(url=player.logo_url)
+    footer = f"Game: {player.game.name}\n"
+    if player.cached_at is not None:
+        footer += stale_note(player.cached_at) + "\n"
+    e.set_footer(text=footer + "Joined VRML on")
+    e.timestamp = player.user.date_joined
+
+    s = "\n".join(
+        f"{b.season.name} | {b.team_name} | {b.division} | MMR: {b.mmr}"
+        for b in player.bio_history
+    )
+    e.add_field(name="Teams history",
+                value=s or "No prior teams")
+
+    return e
+
+
+def _team_embed(team, match_links, vod_links):
+    e = Embed(title=dc_escape(team.name),
+              url=team.url)
+    e.set_author(name=team.division, icon_url=team.division_logo_url)
+    e.description = (f"Rank {team.rank_regional}\n"
+                     f"MMR: {team.mmr}\n"
+                     f"Region: {team.region}\n")
+    e.description += (
+        f"[Discord server invite]({team.discord_invite_url})"
+        if team.discord_invite_url else ""
+    )
+    e.set_thumbnail(url=team.logo_url)
+
+    s = "\n".join(( ('(' if p.is_cooldown else '')
+                    + dc_escape(p.name)
+                    + (')' if p.is_cooldown else '')
+                    + (f" `{p.discord_team_role}`" if p.discord_team_role else '')
+                    for p in team.players))
+    e.add_field(name="Players",
+                value= s or "No players on that team",
+                inline=False)
+    s = "\n".join([match_line(m, team.id, match_links, vod_links)
+                   for m in team.upcoming_matches])
+    e.add_field(name="Upcoming matches",
+                value=s or "No upcoming matches",
+                inline=False)
+
+    # handle lenght limit of 1024 chars in field values
+    match_lines = [match_line(m, team.id, match_links, vod_links)
+                   for m in team.matches]
+    match_blocks = []
+    block = ""
+    for line in match_lines:
+        # replace html italics formatter with discord formatter
+        if "<i>" in line and "</i>" in line:
+            line = line.replace("<i>", "*").replace("</i>", "*")
+        new_block = "\n".join([block, line])
+        if len(new_block) > 1024:
+            match_blocks.append(block)
+            block = line
+            continue
+        block = new_block
+    match_blocks.append(block)  # append last block to list
+
+    e.add_field(name="Past matches",
+                value=match_blocks[0] if match_blocks[0] else "No matches yet",
+                inline=False)
+
+    for block in match_blocks[1:]:
+        e.add_field(name="\u200b",  # zero width space, doesn't render
+                    value=block,
+                    inline=False)
+
+    footer = f"{team.season.name}\nGame: {team.game_name}"
+    if team.cached_at is not None:
+        footer += "\n" + stale_note(team.cached_at)
+    e.set_footer(text=footer)
+    return e
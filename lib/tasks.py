@@ -1,6 +1,5 @@
 from discord.ext.tasks import loop
 from datetime import time, datetime, timezone
-import asyncio
 import json
 import logging
 import vrml
@@ -24,51 +23,62 @@ async def fetch_vrml_discord_player(force=False):
         return
     
     log.info(f"Start updating discord_players.json.")
+    # let user commands go first
+    with vrml.http.priority(vrml.http.BACKGROUND):
+        data = await _fetch_discord_players()
+    with open(f"data/discord_players.json", "w") as f:
+        json.dump(data, f)
+    log.info(f"Finished updating discord_players.json.")
+
+
+async def _fetch_discord_players():
     data = {}
     for game in vrml.utils.short_game_names:
         log.info(f"Updating cache for {game}...")
         game = await vrml.get_game(game)
         p_players = await game.fetch_players()
-        players: list[vrml.Player]= []
-        for i in range(0, len(p_players), 10):
-            # fetching 10 players at once to speed up but not overload
-            # the API
-            async def fetch_player(p_player):
-                for i in range(5):
-                    try:
-                        return await p_player.fetch()
-                    except Exception:
-                        # Catch weird API response returning `None` instead
-                        # of `dict` give it 5 tries or return `None`.
-                        # This usually results in `AttributeError` by trying
-                        # `None.get()` but all `Exception`s are caught just in
-                        # case.
-                        log.warning(f"{p_player.id}.fetch() raised Exception "
-                                    f"on try {i+1}.", exc_info=True)
-                        continue
-                log.warning(f"{p_player.id}.fetch() raised {i+1} `Exception`s "
-                            f"and will be skipped.")
-            coros = [fetch_player(p) for p in p_players[i: i+10]]
-            ret = await asyncio.gather(*coros)
-            players += [p for p in ret if p is not None]
-        for player in players:
+        async def fetch_player(p_player):
+            for i in range(5):
+                try:
+                    player = await p_player.fetch()
+                    break
+                except Exception:
+                    # Catch weird API response returning `None` instead
+                    # of `dict` give it 5 tries or return `None`.
+                    # This usually results in `AttributeError` by trying
+                    # `None.get()` but all `Exception`s are caught just in
+                    # case.
+                    log.warning(f"{p_player.id}.fetch() raised Exception "
+                                f"on try {i+1}.", exc_info=True)
+                    continue
+            else:
+                log.warning(f"{p_player.id}.fetch() raised {i+1} "
+                            f"`Exception`s and will be skipped.")
+                return None
+            # keep only what's needed rather than all players of the game
             id = player.user.discord_id
             if id is None:
-                continue
-            player_data = {
+                return None
+            return id, {
                 "gameName": game.name,
                 "playerID": player.id,
                 "playerName": player.name,
                 "teamID": player.team.id,
                 "teamName": player.team.name
             }
+        # fetching as many players at once as the API copes with
+        ret = await vrml.http.limiter("player crawl").map(fetch_player,
+                                                          p_players)
+        for entry in ret:
+            if entry is None:
+                continue
+            id, player_data = entry
             if id in data:
                 data[id].append(player_data)
             else:
                 data[id] = [player_data]
-    with open(f"data/discord_players.json", "w") as f:
-        json.dump(data, f)
-    log.info(f"Finished updating discord_players.json.")
+    return data
+
 
 def start_tasks():
     try:
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from vrml import http
+from vrml.breaker import CircuitBreaker
+from vrml.cache import ResponseCache, NegativeCache
+from vrml.metrics import Metrics
+from vrml.popularity import Popularity
+from vrml.ratelimit import RateLimiter
+from vrml.scheduler import Scheduler
+
+
+class FakeResponse:
+    def __init__(self, status=200, body=b"{}", headers=None) -> None:
+        self.status = status
+        self.reason = "Fake"
+        self.headers = headers or {}
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+
+class _Request:
+    def __init__(self, session, method, url, kwargs) -> None:
+        self.session = session
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+
+    async def __aenter__(self):
+        self.session.requests.append((self.method, self.url))
+        answer = self.session.answers.pop(0) if self.session.answers \
+                 else FakeResponse()
+        if self.session.delay:
+            await asyncio.sleep(self.session.delay)
+        if isinstance(answer, BaseException):
+            raise answer
+        return answer
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Stands in for the shared `aiohttp.ClientSession`. Answers requests
+    with `answers` in order (responses or exceptions to raise), with a
+    200 and an empty object once they are used up."""
+    closed = False
+
+    def __init__(self) -> None:
+        self.answers = []
+        self.requests = []
+        self.delay = 0
+
+    def request(self, method, url, **kwargs):
+        return _Request(self, method, url, kwargs)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    "Fresh request handling state of `vrml.http`, sending to a fake session."
+    fake = FakeSession()
+
+    async def start():
+        return fake
+
+    monkeypatch.setattr(http, "start", start)
+    monkeypatch.setattr(http, "breaker", CircuitBreaker(threshold=5,
+                                                        cooldown=30))
+    monkeypatch.setattr(http, "rate_limiter", RateLimiter())
+    monkeypatch.setattr(http, "metrics", Metrics())
+    monkeypatch.setattr(http, "scheduler", Scheduler())
+    monkeypatch.setattr(http, "cache", ResponseCache(http.CACHE_TTLS))
+    monkeypatch.setattr(http, "negative_cache", NegativeCache())
+    monkeypatch.setattr(http, "popularity", Popularity())
+    monkeypatch.setattr(http, "disk_cache", None)
+    monkeypatch.setattr(http, "_in_flight", {})
+    monkeypatch.setattr(http, "BACKOFF_BASE", 0.001)
+    return fake
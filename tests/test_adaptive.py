@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from vrml.adaptive import AdaptiveLimiter
+
+
+def test_map_keeps_order():
+    async def double(i):
+        await asyncio.sleep(0.001 * (i % 3))
+        return 2 * i
+
+    limiter = AdaptiveLimiter("test", initial=3)
+    assert asyncio.run(limiter.map(double, range(20))) == \
+        [2 * i for i in range(20)]
+    assert limiter.active == 0
+
+
+def test_map_starts_only_what_runs():
+    started = 0
+    peak = 0
+
+    async def task(i):
+        nonlocal peak
+        peak = max(peak, started - i)
+        await asyncio.sleep(0)
+
+    def func(i):
+        nonlocal started
+        started += 1
+        return task(i)
+
+    limiter = AdaptiveLimiter("test", initial=2, max_limit=2)
+    asyncio.run(limiter.map(func, range(1000)))
+    assert started == 1000
+    assert peak <= 2
+
+
+def test_map_stops_on_error():
+    started = 0
+
+    async def fail(i):
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0)
+        if i == 2:
+            raise ValueError(i)
+        await asyncio.sleep(1)
+
+    limiter = AdaptiveLimiter("test", initial=4)
+    with pytest.raises(ValueError):
+        asyncio.run(limiter.map(fail, range(1000)))
+    assert started < 20
+    assert limiter.active == 0
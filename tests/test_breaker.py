@@ -0,0 +1,57 @@
+from vrml.breaker import CircuitBreaker
+
+
+def test_opens_after_threshold():
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    for _ in range(2):
+        breaker.failure("/a")
+    assert breaker.allow("/a")
+    breaker.failure("/a")
+    assert breaker.state("/a") == breaker.OPEN
+    assert not breaker.allow("/a")
+    assert breaker.allow("/b")
+
+
+def test_success_resets_failures():
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    breaker.failure("/a")
+    breaker.success("/a")
+    breaker.failure("/a")
+    assert breaker.state("/a") == breaker.CLOSED
+    assert breaker.failures("/a") == 1
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.failure("/a")
+    assert breaker.state("/a") == breaker.HALF_OPEN
+    assert breaker.allow("/a")
+    assert not breaker.allow("/a")
+
+
+def test_successful_probe_closes():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.failure("/a")
+    breaker.allow("/a")
+    breaker.success("/a")
+    assert breaker.state("/a") == breaker.CLOSED
+    assert breaker.allow("/a") and breaker.allow("/a")
+
+
+def test_failed_probe_opens_again():
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.failure("/a")
+    breaker.cooldown = 0
+    breaker.allow("/a")
+    breaker.cooldown = 30
+    breaker.failure("/a")
+    assert breaker.state("/a") == breaker.OPEN
+    assert not breaker.allow("/a")
+
+
+def test_aborted_probe_allows_another():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.failure("/a")
+    assert breaker.allow("/a")
+    breaker.abort("/a")
+    assert breaker.allow("/a")
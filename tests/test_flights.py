@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from vrml import http
+from conftest import FakeResponse
+
+PATH = "/Matches/{match_id}/Sets"
+
+
+def route(match_id="m1"):
+    return http.Route("GET", PATH, match_id=match_id)
+
+
+def test_identical_requests_are_sent_once(session):
+    session.delay = 0.01
+    session.answers = [FakeResponse(body=b'{"sets": [1]}')]
+
+    async def main():
+        return await asyncio.gather(*[http.request(route())
+                                      for _ in range(5)])
+
+    results = asyncio.run(main())
+    assert len(session.requests) == 1
+    assert all(r == {"sets": [1]} for r in results)
+    # everyone got their own copy
+    results[0]["sets"].append(2)
+    assert results[1] == {"sets": [1]}
+    assert not http._in_flight
+
+
+def test_cached_response_is_reused(session):
+    async def main():
+        await http.request(route())
+        await http.request(route())
+
+    asyncio.run(main())
+    assert len(session.requests) == 1
+
+
+def test_deadline_ends_wait_not_shared_request(session):
+    session.delay = 0.1
+    session.answers = [FakeResponse(body=b"{}")]
+
+    async def impatient():
+        with http.deadline(0.02):
+            await http.request(route())
+
+    async def main():
+        return await asyncio.gather(impatient(), http.request(route()),
+                                    return_exceptions=True)
+
+    first, second = asyncio.run(main())
+    assert isinstance(first, http.DeadlineExceeded)
+    assert second == {}
+    assert len(session.requests) == 1
+
+
+def test_request_cancelled_once_everyone_gave_up(session):
+    session.delay = 1
+
+    async def main():
+        with http.deadline(0.02):
+            with pytest.raises(http.DeadlineExceeded):
+                await http.request(route())
+        await asyncio.sleep(0.01)
+        assert not http._in_flight
+
+    asyncio.run(main())
+
+
+def test_deadline_extended_by_patient_waiter(session):
+    session.delay = 0.05
+    session.answers = [FakeResponse(body=b"{}")]
+
+    async def waiter(seconds):
+        with http.deadline(seconds):
+            return await http.request(route())
+
+    async def main():
+        return await asyncio.gather(waiter(0.01), waiter(1),
+                                    return_exceptions=True)
+
+    first, second = asyncio.run(main())
+    assert isinstance(first, http.DeadlineExceeded)
+    assert second == {}
+
+
+def test_no_request_past_deadline(session):
+    async def main():
+        with http.deadline(0):
+            await http.request(route())
+
+    with pytest.raises(http.DeadlineExceeded):
+        asyncio.run(main())
+    assert not session.requests
+
+
+def test_outdated_data_served_on_outage(session, monkeypatch):
+    monkeypatch.setattr(http, "RETRIES", 1)
+
+    async def main():
+        # too old to be served while it's refreshed
+        http.cache.set(http._request_key(route(), None), PATH, route().url,
+                       {"old": True}, ttl=-2 * http.STALE_WHILE_REVALIDATE)
+        session.answers = [FakeResponse(502), FakeResponse(502)]
+        data = await http.request(route())
+        await asyncio.sleep(0.01)
+        return data
+
+    data = asyncio.run(main())
+    assert data == {"old": True}
+    assert http.cached_at(data) is not None
+    # not asked again right after failing
+    assert len(session.requests) == 2
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from vrml import http
+from conftest import FakeResponse
+
+PATH = "/Matches/{match_id}/Sets"
+
+
+def route(match_id="m1"):
+    return http.Route("GET", PATH, match_id=match_id)
+
+
+def open_circuit():
+    "Open the circuit of `PATH`, ready to be probed."
+    http.breaker.threshold = 1
+    http.breaker.cooldown = 0
+    http.breaker.failure(PATH)
+
+
+def test_request_decodes_json(session):
+    session.answers = [FakeResponse(body=b'{"a": 1}')]
+    data, _ = asyncio.run(http._request(route()))
+    assert data == {"a": 1}
+
+
+def test_503_is_retried(session):
+    session.answers = [FakeResponse(503), FakeResponse(body=b"[1]")]
+    data, _ = asyncio.run(http._request(route()))
+    assert data == [1]
+    assert len(session.requests) == 2
+
+
+def test_invalid_json_is_a_failure(session):
+    session.answers = [FakeResponse(body=b"<html>Maintenance</html>")]
+    with pytest.raises(http.HTTPUnavailable):
+        asyncio.run(http._request(route()))
+    assert http.breaker.failures(PATH) == 1
+
+
+def test_probe_with_invalid_json_frees_circuit(session):
+    open_circuit()
+    session.answers = [FakeResponse(body=b"<html>Maintenance</html>")]
+    with pytest.raises(http.HTTPUnavailable):
+        asyncio.run(http._request(route()))
+    # the next request probes again instead of failing for good
+    session.answers = [FakeResponse(body=b"{}")]
+    data, _ = asyncio.run(http._request(route()))
+    assert data == {}
+    assert http.breaker.state(PATH) == http.breaker.CLOSED
+
+
+def test_probe_with_unexpected_error_frees_circuit(session):
+    open_circuit()
+    session.answers = [RuntimeError("bug")]
+    with pytest.raises(RuntimeError):
+        asyncio.run(http._request(route()))
+    assert http.breaker.allow(PATH)
+
+
+def test_circuit_open_leaves_probe_alone(session):
+    open_circuit()
+    assert http.breaker.allow(PATH)     # someone else is probing
+    with pytest.raises(http.HTTPCircuitOpen):
+        asyncio.run(http._request(route()))
+    assert not http.breaker.allow(PATH)
+
+
+def test_background_requests_are_not_counted_as_popular(session):
+    async def main():
+        with http.priority(http.BACKGROUND):
+            await http.request(route("crawled"))
+        await http.request(route("asked"))
+        await http.request(route("asked"))
+
+    asyncio.run(main())
+    assert http.popularity.score(http._request_key(route("crawled"),
+                                                   None)) == 0
+    assert len(http.popularity) == 1
+
+
+def test_bulk_responses_only_replace_stored_ones(session, tmp_path,
+                                                 monkeypatch):
+    disk_cache = http.DiskCache(tmp_path, http.CACHE_TTLS)
+    monkeypatch.setattr(http, "disk_cache", disk_cache)
+    asked = http._request_key(route("asked"), None)
+
+    async def main():
+        await http.request(route("asked"))
+        # long expired, has to be asked for again
+        disk_cache._write(asked, {"path": PATH, "expires": 0, "data": {},
+                                  "etag": "x"})
+        http.cache.clear()
+        session.answers = [FakeResponse(body=b'{"new": 1}')]
+        with http.priority(http.BACKGROUND):
+            await http.request(route("asked"))
+            await http.request(route("crawled"))
+
+    asyncio.run(main())
+    assert len(list(tmp_path.glob("*.json"))) == 1
+    assert disk_cache._read(asked)["data"] == {"new": 1}
@@ -0,0 +1,77 @@
+from vrml.identity import IdentityMap
+from vrml.season import Season
+from vrml.team import PartialTeam
+
+
+def seasons():
+    return IdentityMap(
+        "seasons", ("seasonID",),
+        ("seasonID", "seasonName", "dateStartUTC"))
+
+
+def test_same_id_same_instance():
+    m = seasons()
+    a = m.resolve(Season, {"seasonID": "s1", "seasonName": "Season 1"})
+    b = m.resolve(Season, {"seasonID": "s1", "seasonName": "Season 1",
+                           "other": "ignored"})
+    assert a is b
+    assert m.stats()["hits"] == 1
+
+
+def test_payload_without_id_is_not_shared():
+    m = seasons()
+    a = m.resolve(Season, {"seasonName": "Season 1"})
+    assert a.name == "Season 1"
+    assert len(m) == 0
+
+
+def test_missing_keys_keep_known_values():
+    m = seasons()
+    a = m.resolve(Season, {"seasonID": "s1", "seasonName": "Season 1",
+                           "dateStartUTC": "2022-01-01 00:00"})
+    b = m.resolve(Season, {"seasonID": "s1", "seasonName": None})
+    assert a is b
+    assert b.name == "Season 1"
+    assert b.start is not None
+
+
+def test_only_state_keys_are_kept():
+    m = seasons()
+    a = m.resolve(Season, {"seasonID": "s1", "big": list(range(100))})
+    assert "big" not in a._data
+
+
+def test_changes_dont_touch_instances_handed_out():
+    m = seasons()
+    a = m.resolve(Season, {"seasonID": "s1", "seasonName": "Season 1",
+                           "dateStartUTC": "2022-01-01 00:00"})
+    b = m.resolve(Season, {"seasonID": "s1", "seasonName": "Renamed"})
+    assert a is not b
+    assert a.name == "Season 1"
+    assert b.name == "Renamed"
+    assert b.start == a.start
+    assert m.resolve(Season, {"seasonID": "s1"}) is b
+    assert m.stats()["updates"] == 1
+
+
+def test_aliases_merge_payload_shapes():
+    m = IdentityMap(
+        "teams", ("teamID", "id"),
+        ("teamID", "teamName", "teamLogo", "id", "name", "image"),
+        aliases={"id": "teamID", "name": "teamName", "image": "teamLogo"})
+    a = m.resolve(PartialTeam, {"id": "t1", "name": "Team",
+                                "image": "/logo.png"})
+    b = m.resolve(PartialTeam, {"teamID": "t1", "teamName": "Team"})
+    assert a is b
+    assert b.logo_url.endswith("/logo.png")
+
+
+def test_least_recently_used_dropped():
+    m = IdentityMap("seasons", ("seasonID",), ("seasonID",), max_size=2)
+    first = m.resolve(Season, {"seasonID": "s1"})
+    m.resolve(Season, {"seasonID": "s2"})
+    m.resolve(Season, {"seasonID": "s1"})
+    m.resolve(Season, {"seasonID": "s3"})
+    assert len(m) == 2
+    assert m.resolve(Season, {"seasonID": "s1"}) is first
+    assert m.stats()["misses"] == 3
@@ -0,0 +1,91 @@
+import asyncio
+
+from vrml.ratelimit import Bucket, RateLimiter
+
+
+def run(coro, timeout=2):
+    return asyncio.run(asyncio.wait_for(coro, timeout))
+
+
+def test_no_headers_no_limit():
+    async def main():
+        bucket = Bucket("/a", probe=False)
+        for _ in range(100):
+            assert await bucket.acquire() < 0.01
+
+    run(main())
+
+
+def test_probe_waits_for_first_response():
+    async def main():
+        bucket = Bucket("/a")
+        await bucket.acquire()
+        second = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0.01)
+        assert not second.done()
+        bucket.update(limit=5, remaining=4, reset_after=1)
+        await second
+        assert bucket.remaining == 3
+
+    run(main())
+
+
+def test_waits_for_reset_when_exhausted():
+    async def main():
+        bucket = Bucket("/a", probe=False)
+        bucket.update(limit=2, remaining=1, reset_after=0.05)
+        assert await bucket.acquire() < 0.01
+        waited = await bucket.acquire()
+        assert waited >= 0.04
+        assert bucket.remaining == 1
+
+    run(main())
+
+
+def test_keeps_lowest_remaining():
+    async def main():
+        bucket = Bucket("/a", probe=False)
+        bucket.update(limit=10, remaining=3, reset_after=1)
+        # out of order, sent before the other one
+        bucket.update(limit=10, remaining=7, reset_after=1)
+        assert bucket.remaining == 3
+
+    run(main())
+
+
+def test_reserve_left_for_others():
+    async def main():
+        bucket = Bucket("/a", probe=False)
+        bucket.update(limit=10, remaining=3, reset_after=0.05)
+        await bucket.acquire(reserve=2)
+        assert not bucket.spare(reserve=2)
+        waited = await bucket.acquire(reserve=2)
+        assert waited >= 0.04
+        assert await bucket.acquire() < 0.01
+
+    run(main())
+
+
+def test_reserve_larger_than_bucket():
+    async def main():
+        bucket = Bucket("/a", probe=False)
+        bucket.update(limit=2, remaining=2, reset_after=0.05)
+        assert await bucket.acquire(reserve=5) < 0.01
+        assert bucket.remaining == 1
+        waited = await bucket.acquire(reserve=5)
+        assert 0.04 <= waited < 1
+
+    run(main())
+
+
+def test_blocked_on_429():
+    async def main():
+        limiter = RateLimiter()
+        limiter.get_bucket("/a").update(limit=10, remaining=10,
+                                        reset_after=1)
+        assert limiter.block("/a", {"X-RateLimit-Reset-After": "0.05"}) \
+            == 0.05
+        waited = await limiter.acquire("/a")
+        assert waited >= 0.04
+
+    run(main())
@@ -0,0 +1,194 @@
+"""Measure how long decoding API payloads into `vrml` models takes.
+
+Uses the responses recorded by the stand-in (`tools/standin.py --record`)
+if there are any, generated ones otherwise. With `--compare` the same
+payloads are decoded by the `vrml` of another git revision too, e.g. the
+hand-written constructors before the field schemas.
+
+    python tools/decode_bench.py
+    python tools/decode_bench.py --fixtures tools/fixtures -n 2000
+    python tools/decode_bench.py --compare 982c7e8
+"""
+from pathlib import Path
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+TOOLS = Path(__file__).resolve().parent
+# `--compare` runs this script again with the `vrml` of another revision
+sys.path.insert(0, os.environ.get("DECODE_BENCH_ROOT", str(TOOLS.parent)))
+sys.path.insert(0, str(TOOLS))
+import vrml
+from standin import Synthetic, GAMES
+
+
+def _copy(data):
+    "Copy a payload, older `vrml` versions modified them while decoding."
+    if isinstance(data, dict):
+        return {k: _copy(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_copy(v) for v in data]
+    return data
+
+
+def _matches(matches):
+    for m in matches:
+        m.date_scheduled, m.casting_info, m.home_team, m.away_team
+
+
+def player_fields(data):
+    "Decode a player and read all its fields, like the `/player` command."
+    p = vrml.Player(data)
+    p.user.date_joined, p.team
+    for b in [p.bio_current] + p.bio_history:
+        b.season.start, b.season.end_date, b.cooldown_date_expires
+    return p
+
+
+def team_fields(data):
+    "Decode a team and read all its fields, like the `/team` command."
+    t = vrml.Team(data)
+    t.season.start, t.map_stats, t.ex_memers
+    for s in t.seasons_played:
+        s.start
+    for p in t.players:
+        p.cooldown_date_expires
+    _matches(t.upcoming_matches)
+    _matches(t.matches)
+    return t
+
+
+def game_fields(data):
+    "Decode a game and read all its fields."
+    g = vrml.Game(data)
+    g.current_season.start
+    for n in g.news_posts:
+        n.date_submitted, n.date_edited
+    return g
+
+
+def payloads(args):
+    "Return {kind: [payload, ...]} to decode."
+    kinds = {"player": [], "team": [], "game": [], "players page": []}
+    for file in sorted(Path(args.fixtures).glob("*.json")):
+        recorded = json.loads(file.read_text(encoding="utf-8"))
+        path = recorded["request"].split("?")[0].strip("/").split("/")
+        body = json.loads(recorded["body"])
+        if not body:
+            continue
+        if path[0] == "Players" and path[-1] == "Detailed":
+            kinds["player"].append(body)
+        elif path[0] == "Teams":
+            kinds["team"].append(body)
+        elif len(path) == 1 and path[0] in GAMES:
+            kinds["game"].append(body)
+        elif len(path) == 2 and path[1] == "Players":
+            kinds["players page"].append(body)
+    if not any(kinds.values()):
+        s = Synthetic()
+        game = "EchoArena"
+        kinds = {
+            "player": [s.player_detailed(s._player_id(game, i))
+                       for i in range(20)],
+            "team": [s.team(s._team_id(game, i)) for i in range(5)],
+            "game": [s.game(game)],
+            "players page": [s.game_players(game, 1)],
+        }
+    return kinds
+
+
+CASES = (
+    ("player", "Player", vrml.Player),
+    ("player", "Player, all fields", player_fields),
+    ("team", "Team", vrml.Team),
+    ("team", "Team, all fields", team_fields),
+    ("game", "Game, all fields", game_fields),
+    ("players page", "PartialPlayer x page",
+     lambda data: [vrml.PartialPlayer(d) for d in data["players"]]),
+)
+
+
+def bench(decode, data, n, repeat):
+    "Best time of `repeat` runs decoding `n` fresh copies of `data`."
+    best = None
+    for _ in range(repeat):
+        copies = [_copy(data) for _ in range(n)]
+        started = time.perf_counter()
+        for d in copies:
+            decode(d)
+        took = (time.perf_counter() - started) / n
+        best = took if best is None else min(best, took)
+    return best
+
+
+def run(args):
+    "Return {label: (mean seconds per decode, number of payloads)}."
+    kinds = payloads(args)
+    results = {}
+    for kind, label, decode in CASES:
+        if not kinds[kind]:
+            continue
+        times = [bench(decode, data, args.n, args.repeat)
+                 for data in kinds[kind]]
+        results[label] = (sum(times) / len(times), len(times))
+    return results
+
+
+def run_at(rev, args):
+    "`run` with the `vrml` package of the git revision `rev`."
+    with tempfile.TemporaryDirectory() as root:
+        archive = subprocess.run(["git", "archive", rev, "vrml"],
+                                 cwd=TOOLS.parent, check=True,
+                                 capture_output=True).stdout
+        with tarfile.open(fileobj=io.BytesIO(archive)) as t:
+            t.extractall(root)
+        out = subprocess.run(
+            [sys.executable, __file__, "--fixtures", args.fixtures,
+             "-n", str(args.n), "--repeat", str(args.repeat), "--json"],
+            env=dict(os.environ, DECODE_BENCH_ROOT=root), check=True,
+            capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def main(args):
+    if args.json:
+        print(json.dumps(run(args)))
+        return
+    results = run(args)
+    if not args.compare:
+        for label, (took, n) in results.items():
+            print(f"{label:<24} {took * 1e6:9.1f} us ({n} payloads)")
+        return
+    # alternate, the machine's load changes over time
+    base = {}
+    for _ in range(args.rounds):
+        for label, (took, _) in run_at(args.compare, args).items():
+            base[label] = min(took, base.get(label, took))
+        for label, (took, n) in run(args).items():
+            results[label] = (min(took, results[label][0]), n)
+    print(f"{'':<24} {'current':>10} {args.compare[:10]:>10}")
+    for label, (took, n) in results.items():
+        if label not in base:
+            continue
+        print(f"{label:<24} {took * 1e6:7.1f} us {base[label] * 1e6:7.1f} us "
+              f"{(took / base[label] - 1) * 100:+5.0f}%")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--fixtures", default="tools/fixtures")
+    p.add_argument("-n", type=int, default=200,
+                   help="decodes per payload and run")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--compare", metavar="REV",
+                   help="also decode with the vrml of this git revision")
+    p.add_argument("--rounds", type=int, default=3,
+                   help="alternating runs of both versions for --compare")
+    p.add_argument("--json", action="store_true", help=argparse.SUPPRESS)
+    main(p.parse_args())
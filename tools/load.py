@@ -0,0 +1,87 @@
+"""Run a reproducible workload against the VRML API or a stand-in and print
+the request metrics.
+
+    python tools/standin.py --latency 0.1 --rate-limit 40/5 &
+    VRML_API_BASE=http://127.0.0.1:8080 python tools/load.py commands
+"""
+from collections import Counter
+from pathlib import Path
+import argparse
+import asyncio
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import vrml
+
+# failed fetches per exception, e.g. `AttributeError` for `null` bodies
+failures = Counter()
+
+
+async def fetch(partial, tries=5):
+    """`partial.fetch()`, tried up to `tries` times like the crawl does.
+    Failures are counted, `None` is returned if all tries fail."""
+    for _ in range(tries):
+        try:
+            return await partial.fetch()
+        except Exception as e:
+            failures[e.__class__.__name__] += 1
+    failures["skipped"] += 1
+    return None
+
+
+async def commands(args):
+    "Lookups like the `/team` and `/player` commands send them."
+    async def team(i):
+        game = await vrml.get_game(args.game)
+        teams = await game.search_team(f"Team {i % args.distinct}")
+        return await asyncio.gather(*[fetch(t) for t in teams[:10]])
+
+    async def player(i):
+        players = await vrml.player_search(f"Player{i % args.distinct}")
+        return await asyncio.gather(*[fetch(p) for p in players[:10]])
+
+    await asyncio.gather(*[team(i) for i in range(args.n)],
+                         *[player(i) for i in range(args.n)])
+
+
+async def crawl(args):
+    "Fetch the details of all players of a game like the weekly crawl."
+    with vrml.http.priority(vrml.http.BACKGROUND):
+        game = await vrml.get_game(args.game)
+        players = await game.fetch_players()
+        await vrml.http.limiter("player crawl").map(fetch, players[:args.n])
+
+
+SCENARIOS = {
+    "commands": commands,
+    "crawl": crawl,
+}
+
+
+async def main(args):
+    started = time.perf_counter()
+    try:
+        await SCENARIOS[args.scenario](args)
+    finally:
+        await vrml.http.close()
+    print(f"{args.scenario} took {time.perf_counter() - started:.2f} s")
+    print("failed fetches: " + (", ".join(f"{name} {n}" for name, n
+                                          in failures.most_common())
+                                or "none") + "\n")
+    print(vrml.http.metrics.format())
+    print()
+    print(vrml.http.scheduler.format())
+    for limiter in vrml.http.limiters.values():
+        print(limiter.format())
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("scenario", choices=SCENARIOS)
+    p.add_argument("-n", type=int, default=50,
+                   help="number of commands or players to fetch")
+    p.add_argument("--distinct", type=int, default=10,
+                   help="number of distinct names looked up")
+    p.add_argument("--game", default="Echo Arena")
+    asyncio.run(main(p.parse_args()))
@@ -0,0 +1,518 @@
+"""Local stand-in for the VRML API, for offline testing and benchmarking.
+
+Serves the endpoints used by `vrml.http` from recorded fixtures or, if no
+fixture exists for a request, from generated (but consistent) data. Latency,
+rate limits, 503s and `null` bodies can be injected.
+
+Replay recorded fixtures, generate missing ones:
+
+    python tools/standin.py --latency 0.15 --rate-limit 30/10
+
+Record responses of the real API once, while passing them through:
+
+    python tools/standin.py --record
+
+Point the bot or any script at the stand-in with the environment variable
+`VRML_API_BASE=http://127.0.0.1:8080`.
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from vrml.utils import short_game_names
+
+log = logging.getLogger("standin")
+
+UPSTREAM = "https://api.vrmasterleague.com"
+GAMES = {short: name for name, short in short_game_names.items()}
+PER_PAGE = 100
+PLAYERS_PER_GAME = 1000
+TEAMS_PER_GAME = 200
+
+
+def _date(dt):
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _rng(*seed):
+    return random.Random(":".join(str(s) for s in seed))
+
+
+class Synthetic:
+    """Generates payloads shaped like the ones of the API. The same
+    request always gives the same data and IDs refer to each other, e.g.
+    a player's team can be fetched from `/Teams/{id}`."""
+    def __init__(self) -> None:
+        self.now = datetime.utcnow().replace(microsecond=0)
+
+    def season(self, game):
+        start = self.now - timedelta(days=40)
+        return {
+            "seasonID": f"{game}-S1",
+            "seasonName": "Season 1",
+            "isCurrent": True,
+            "championshipUrl": None,
+            "dateStartUTC": _date(start),
+            "dateEndUTC": _date(start + timedelta(days=70)),
+            "dateChampionshipStartUTC": _date(start + timedelta(days=75)),
+        }
+
+    def partial_game(self, game):
+        return {
+            "gameID": game,
+            "gameName": GAMES[game],
+            "teamMode": "Team",
+            "matchMode": "Standard",
+            "url": f"/{game}",
+            "hasSubstitutes": True,
+            "hasTies": False,
+            "hasCasters": True,
+            "hasCameraman": True,
+        }
+
+    def game(self, game):
+        rng = _rng("game", game)
+        data = self.partial_game(game)
+        data.update({
+            "urlComplete": f"https://vrmasterleague.com/{game}",
+            "gameByUrl": None,
+            "gameByImage": game,
+            "headerImage": game,
+            "youtube": None,
+            "twitter": game,
+            "reddit": game,
+            "facebook": game,
+            "discordInvite": game,
+        })
+        news = [{
+            "newsID": f"{game}-news-{i}",
+            "userID": f"user-{rng.randrange(PLAYERS_PER_GAME)}",
+            "userName": f"Admin {i}",
+            "userLogo": "/images/logos/users/default.png",
+            "dateSubmittedUTC": _date(self.now - timedelta(days=3 * i)),
+            "dateEditedUTC": None,
+            "title": f"News post {i}",
+            "html": "<p>Lorem ipsum</p>",
+        } for i in range(10)]
+        return {
+            "game": data,
+            "newsPosts": news,
+            "nextMatches": [self.match(game, self._team_id(game, i), i, True)
+                            for i in range(5)],
+            "season": self.season(game),
+        }
+
+    def _team_id(self, game, i):
+        return f"{game}-T{i % TEAMS_PER_GAME}"
+
+    def _player_id(self, game, i):
+        return f"{game}-P{i % PLAYERS_PER_GAME}"
+
+    def _split(self, id):
+        game, _, rest = id.rpartition("-")
+        return game, int(rest[1:])
+
+    def partial_team(self, team_id, search=False):
+        game, i = self._split(team_id)
+        name = f"{GAMES[game]} Team {i}"
+        logo = "/images/logos/teams/default.png"
+        if search:
+            return {"id": team_id, "name": name, "image": logo}
+        return {"teamID": team_id, "teamName": name, "teamLogo": logo}
+
+    def partial_player(self, player_id, search=False):
+        game, i = self._split(player_id)
+        name = f"Player{i}"
+        logo = "/images/logos/users/default.png"
+        if search:
+            return {"id": player_id, "name": name, "image": logo}
+        return {"playerID": player_id, "playerName": name, "playerLogo": logo}
+
+    def match(self, game, team_id, i, upcoming=False):
+        rng = _rng("match", team_id, i, upcoming)
+        _, t = self._split(team_id)
+        other = self._team_id(game, t + 1 + rng.randrange(TEAMS_PER_GAME - 1))
+        home, away = (team_id, other) if rng.random() < 0.5 \
+                     else (other, team_id)
+        if upcoming:
+            date = self.now + timedelta(days=i + 1, hours=rng.randrange(24))
+        else:
+            date = self.now - timedelta(days=7 * (i + 1))
+        home_score, away_score = rng.randrange(4), rng.randrange(4)
+        home_team = self.partial_team(home)
+        away_team = self.partial_team(away)
+        home_team["submittedScores"] = not upcoming
+        away_team["submittedScores"] = not upcoming
+        return {
+            "seasonName": "Season 1",
+            "winningTeamID": home if home_score >= away_score else away,
+            "losingTeamID": away if home_score >= away_score else home,
+            "homeScore": home_score,
+            "awayScore": away_score,
+            "isTie": False,
+            "isForfeit": False,
+            "matchID": f"{team_id}-M{i}{'u' if upcoming else ''}",
+            "week": i + 1,
+            "isScheduled": True,
+            "isSpecificDivision": False,
+            "isChallenge": False,
+            "isCup": False,
+            "dateScheduledUTC": _date(date),
+            "dateScheduledUser": _date(date),
+            "dateScheduledUserTimezone": "UTC",
+            "vodUrl": "https://youtu.be/dQw4w9WgXcQ" if rng.random() < 0.3
+                      else None,
+            "homeHighlights": None,
+            "awayHighlights": None,
+            "postponeTeamID": None,
+            "modsReview": False,
+            "modsReviewNote": None,
+            "castingInfo": {
+                "channelType": None, "channelID": None, "channelURL": None,
+                "casterID": None, "caster": None, "casterLogo": None,
+                "coCasterID": None, "coCaster": None, "coCasterLogo": None,
+                "cameramanID": None, "cameraman": None,
+                "cameramanLogo": None, "postGameInterviewID": None,
+                "postGameInterview": None, "postGameInterviewLogo": None,
+            },
+            "homeTeam": home_team,
+            "awayTeam": away_team,
+        }
+
+    def _bio(self, player_id, team_id, season):
+        game, i = self._split(player_id)
+        data = dict(season)
+        data.update(self.partial_team(team_id))
+        data.update({
+            "divisionLogo": "/images/div/gold.png",
+            "divisionName": "Gold",
+            "mmr": 1000 + i,
+            "playerID": player_id,
+            "userID": f"user-{i}",
+            "playerName": f"Player{i}",
+            "userLogo": "/images/logos/users/default.png",
+            "country": "DE",
+            "nationality": "DE",
+            "roleID": None,
+            "role": "Player",
+            "isTeamOwner": False,
+            "isTeamStarter": True,
+            "honoursMention": None,
+            "honoursMentionLogo": None,
+            "cooldownID": None,
+            "cooldownNote": None,
+            "cooldownDateExpiresUTC": None,
+        })
+        return data
+
+    def _team_of(self, player_id):
+        game, i = self._split(player_id)
+        return self._team_id(game, i // 5)
+
+    def player_detailed(self, player_id):
+        game, i = self._split(player_id)
+        season = self.season(game)
+        bio = self._bio(player_id, self._team_of(player_id), season)
+        history = [bio] + [
+            self._bio(player_id, self._team_id(game, i + s), dict(
+                season, seasonID=f"{game}-S0{s}", seasonName=f"Season 0{s}",
+                isCurrent=False))
+            for s in range(1, 6)]
+        return {
+            "user": {
+                "userID": f"user-{i}",
+                "userName": f"Player{i}",
+                "userLogo": "/images/logos/users/default.png",
+                "country": "DE",
+                "nationality": "DE",
+                "dateJoinedUTC": _date(self.now - timedelta(days=400 + i)),
+                "streamUrl": None,
+                "discordID": str(100000000000000000 + i),
+                "discordTag": f"Player{i}#{i % 10000:04d}",
+                "isTerminated": False,
+            },
+            "thisGame": {
+                "playerID": player_id,
+                "playerName": f"Player{i}",
+                "userLogo": "/images/logos/users/default.png",
+                "game": self.partial_game(game),
+                "bioCurrent": bio,
+                "bioHistory": history,
+            },
+        }
+
+    def team(self, team_id):
+        game, i = self._split(team_id)
+        data = self.partial_team(team_id)
+        players = []
+        for p in range(i * 5, i * 5 + 5):
+            player = self._bio(self._player_id(game, p), team_id,
+                               self.season(game))
+            player.update({"isCooldown": False, "cooldownNote": None,
+                           "discordTeamRole": 1 if p == i * 5 else None,
+                           "streamURL": None})
+            players.append(player)
+        data.update({
+            "recruitPossible": True, "missingGPForMMR": 0,
+            "regionID": "EU", "regionName": "Europe", "fanart": None,
+            "gameName": GAMES[game], "divisionName": "Gold",
+            "divisionLogo": "/images/div/gold.png",
+            "gp": 20, "w": 12, "t": 0, "l": 8, "pts": 36, "plusMinus": 4,
+            "mmr": 1200, "cycleGP": 0, "cycleW": 0, "cycleT": 0,
+            "cycleL": 0, "cycleTieBreaker": 0, "cyclePlusMinus": 0,
+            "cycleScoreTotal": 0, "isActive": True, "isRetired": False,
+            "isDeleted": False, "isRecruiting": False,
+            "isBlockingRecruiting": False, "isMaster": False,
+            "isLeagueTeam": True, "maxChallengesThisWeek": 2,
+            "rank": i + 1, "rankWorldwide": i + 1,
+            "seasonsPlayed": [self.season(game)],
+            "players": players,
+            "bio": {"bioInfo": None, "discordServerID": None,
+                    "discordInvite": None},
+            "upcomingMatches": [self.match(game, team_id, m, True)
+                                for m in range(2)],
+        })
+        return {
+            "team": data,
+            "season": self.season(game),
+            "seasonStatsMaps": [{
+                "mapName": f"Map {m}", "played": 10, "win": 6,
+                "winPercentage": 60, "roundsPlayed": 30, "roundsWin": 17,
+                "roundsWinPercentage": 57,
+            } for m in range(3)],
+            "seasonMatches": [self.match(game, team_id, m)
+                              for m in range(100)],
+            "exMembers": [],
+        }
+
+    def game_players(self, game, pos_min):
+        start = max(pos_min, 1) - 1
+        return {
+            "total": PLAYERS_PER_GAME,
+            "nbPerPage": PER_PAGE,
+            "players": [self.partial_player(self._player_id(game, i))
+                        for i in range(start, min(start + PER_PAGE,
+                                                  PLAYERS_PER_GAME))],
+        }
+
+    def player_search(self, name):
+        name = name.lower()
+        return [self.partial_player(self._player_id(game, i), search=True)
+                for game in GAMES for i in range(PLAYERS_PER_GAME)
+                if name in f"player{i}"][:500]
+
+    def team_search(self, game, name):
+        name = name.lower()
+        return [self.partial_team(self._team_id(game, i), search=True)
+                for i in range(TEAMS_PER_GAME)
+                if name in f"{GAMES[game]} team {i}".lower()]
+
+    def match_sets(self, match_id):
+        rng = _rng("sets", match_id)
+        return [{"map": f"Map {s}", "mapID": f"map-{s}",
+                 "scoreHome": rng.randrange(10),
+                 "scoreAway": rng.randrange(10)} for s in range(3)]
+
+
+def _template(path):
+    "Return the endpoint template of `path`, e.g. `/Teams/{team_id}`."
+    match path.strip("/").split("/"):
+        case ["Players", "Search"]:
+            return "/Players/Search"
+        case ["Players", _, "Detailed"]:
+            return "/Players/{player_id}/Detailed"
+        case ["Teams", _]:
+            return "/Teams/{team_id}"
+        case ["Matches", _, "Sets"]:
+            return "/Matches/{match_id}/Sets"
+        case [_]:
+            return "/{game}"
+        case [_, "Players"]:
+            return "/{game}/Players"
+        case [_, "Teams", "Search"]:
+            return "/{game}/Teams/Search"
+    return path
+
+
+class RateLimit:
+    "Fixed window rate limit, reported with the same headers as VRML."
+    def __init__(self, limit, window, is_global=False) -> None:
+        self.limit = limit
+        self.window = window
+        self.is_global = is_global
+        self.remaining = limit
+        self.reset_at = 0
+
+    def take(self):
+        "Returns whether the request is allowed and the headers to send."
+        now = time.monotonic()
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+        allowed = self.remaining > 0
+        if allowed:
+            self.remaining -= 1
+        reset_after = self.reset_at - now
+        return allowed, {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+            "X-RateLimit-Global": str(self.is_global),
+        }
+
+
+class StandIn:
+    def __init__(self, args) -> None:
+        self.args = args
+        self.fixtures = Path(args.fixtures)
+        self.fixtures.mkdir(parents=True, exist_ok=True)
+        self.synthetic = Synthetic()
+        self.rate_limits = {}
+        self.rng = random.Random(args.seed)
+        self.session = None
+
+    def _rate_limit(self, request):
+        "Return the rate limit for the request, per endpoint or global."
+        if not self.args.rate_limit:
+            return None
+        key = "global" if self.args.global_limit else _template(request.path)
+        rate_limit = self.rate_limits.get(key, None)
+        if rate_limit is None:
+            limit, _, window = self.args.rate_limit.partition("/")
+            rate_limit = RateLimit(int(limit), float(window or 1),
+                                   self.args.global_limit)
+            self.rate_limits[key] = rate_limit
+        return rate_limit
+
+    def _fixture(self, request):
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query.items()))
+        key = f"{request.path}?{query}"
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return key, self.fixtures / f"{name}.json"
+
+    async def _upstream(self, request):
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        url = self.args.upstream + request.path
+        async with self.session.get(url, params=request.query) as r:
+            return r.status, await r.text(encoding="utf-8")
+
+    def _generate(self, request):
+        path = request.path.strip("/").split("/")
+        query = request.query
+        s = self.synthetic
+        match path:
+            case ["Players", "Search"]:
+                return s.player_search(query.get("name", ""))
+            case ["Players", id, "Detailed"]:
+                return s.player_detailed(id)
+            case ["Teams", id]:
+                return s.team(id)
+            case ["Matches", id, "Sets"]:
+                return s.match_sets(id)
+            case [game] if game in GAMES:
+                return s.game(game)
+            case [game, "Players"] if game in GAMES:
+                return s.game_players(game, int(query.get("posMin", 1)))
+            case [game, "Teams", "Search"] if game in GAMES:
+                return s.team_search(game, query.get("name", ""))
+        raise web.HTTPNotFound()
+
+    async def handle(self, request):
+        args = self.args
+        headers = {}
+        if args.latency:
+            await asyncio.sleep(self.rng.expovariate(1 / args.latency))
+        rate_limit = self._rate_limit(request)
+        if rate_limit is not None:
+            allowed, headers = rate_limit.take()
+            if not allowed:
+                return web.json_response({"error": "rate limited"},
+                                         status=429, headers=headers)
+        if self.rng.random() < args.error_rate:
+            return web.Response(status=503, headers=headers)
+        if (request.path.endswith("/Detailed")
+                and self.rng.random() < args.null_rate):
+            return web.Response(text="null", content_type="application/json",
+                                headers=headers)
+
+        key, file = self._fixture(request)
+        if args.record:
+            status, body = await self._upstream(request)
+            if status == 200:
+                file.write_text(json.dumps({"request": key, "body": body}),
+                                encoding="utf-8")
+                log.info(f"Recorded {key}")
+            return web.Response(status=status, text=body, headers=headers,
+                                content_type="application/json")
+        if file.exists():
+            body = json.loads(file.read_text(encoding="utf-8"))["body"]
+        elif args.synthetic:
+            body = json.dumps(self._generate(request))
+        else:
+            raise web.HTTPNotFound()
+
+        etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+        headers["ETag"] = etag
+        if request.headers.get("If-None-Match", None) == etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=body, headers=headers,
+                            content_type="application/json")
+
+    async def close(self, app):
+        if self.session is not None:
+            await self.session.close()
+
+
+def make_app(args):
+    standin = StandIn(args)
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", standin.handle)
+    app.on_cleanup.append(standin.close)
+    return app
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--fixtures", default="tools/fixtures",
+                   help="folder of recorded responses")
+    p.add_argument("--record", action="store_true",
+                   help="pass requests through to the real API and record "
+                        "the responses")
+    p.add_argument("--upstream", default=UPSTREAM,
+                   help="API to record from")
+    p.add_argument("--no-synthetic", dest="synthetic", action="store_false",
+                   help="answer 404 instead of generating missing fixtures")
+    p.add_argument("--latency", type=float, default=0.0,
+                   help="mean added latency in seconds (exponential)")
+    p.add_argument("--rate-limit", default=None, metavar="N/SECONDS",
+                   help="allow N requests per window and endpoint, 429 "
+                        "otherwise")
+    p.add_argument("--global-limit", action="store_true",
+                   help="apply the rate limit to all endpoints together")
+    p.add_argument("--error-rate", type=float, default=0.0,
+                   help="share of requests answered with 503")
+    p.add_argument("--null-rate", type=float, default=0.0,
+                   help="share of `/Players/{id}/Detailed` answered `null`")
+    p.add_argument("--seed", default=None, help="seed for injected faults")
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    web.run_app(make_app(args), host=args.host, port=args.port)
@@ -1,5 +1,5 @@
 from .utils import *
-from . import http
+from . import http, identity
 from .season import Season
 from .user import User
 from .game import PartialGame, Game
@@ -0,0 +1,218 @@
+from collections import deque
+import contextvars
+import asyncio
+import time
+import logging
+
+__all__ = (
+    "AdaptiveLimiter",
+    "held_back",
+)
+
+log = logging.getLogger(__name__)
+
+
+class _HeldBack:
+    __slots__ = ("seconds",)
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+
+_held_back = contextvars.ContextVar("vrml_held_back", default=None)
+
+
+def held_back(seconds):
+    """Count `seconds` the current task was held back on our side, e.g. by
+    the rate limiter. That's not the API being slow."""
+    held = _held_back.get()
+    if held is not None:
+        held.seconds += seconds
+
+
+class AdaptiveLimiter:
+    """Limits how many tasks of a bulk job run at once and adapts the limit
+    to how well the API copes (AIMD).
+
+    The limit grows by 1 for every `limit` tasks that finish without
+    signs of overload, and is multiplied by `backoff` on overload: a task
+    failing with one of `overload_errors`, the `overload_count()` (e.g.
+    429 and 503 responses) going up, or the recent latency getting
+    `latency_factor` times the usual latency. It stays between
+    `min_limit` and `max_limit`.
+
+    Recent and usual latency are moving averages over about the last 10
+    and 200 tasks, without the time they were `held_back`. Tasks faster
+    than `min_latency` seconds (probably cache hits) don't count.
+    """
+    def __init__(self, name, initial=4, min_limit=1, max_limit=16,
+                 backoff=0.5, latency_factor=2.0, min_latency=0.02,
+                 overload_count=None, overload_errors=()) -> None:
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_factor = latency_factor
+        self.min_latency = min_latency
+        self.overload_count = overload_count
+        self.overload_errors = overload_errors
+        self.active = 0
+        self.baseline = None    # usual latency in seconds
+        self.recent = None      # recent latency in seconds
+        self._waiters = deque()
+        self._successes = 0     # since the limit last changed
+        self._since_decrease = 0
+        self._overloads = overload_count() if overload_count else 0
+        self.increases = 0
+        self.decreases = 0
+        self.peak = self.limit
+
+    def __len__(self):
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.active < int(self.limit) and not self._waiters:
+            self.active += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.active < int(self.limit):
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self.active += 1
+            fut.set_result(None)
+
+    def _overloaded(self, latency, error):
+        if error is not None and isinstance(error, self.overload_errors):
+            return True
+        if self.overload_count is not None:
+            count = self.overload_count()
+            if count > self._overloads:
+                self._overloads = count
+                return True
+        if latency < self.min_latency:
+            return False
+        if self.baseline is None:
+            self.baseline = self.recent = latency
+            return False
+        self.recent += (latency - self.recent) * 0.1
+        # the API getting slower for good isn't taken as overload forever
+        self.baseline += (latency - self.baseline) * 0.005
+        return self.recent > self.baseline * self.latency_factor
+
+    def record(self, latency, error=None):
+        "Adapt the limit to a task that took `latency` seconds."
+        self._since_decrease += 1
+        if self._overloaded(latency, error):
+            # once per round of tasks, they all saw the same overload
+            if self._since_decrease >= self.limit:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.decreases += 1
+                self._since_decrease = 0
+                log.info("%s: overloaded, limit down to %d.", self.name,
+                         self.limit)
+            self._successes = 0
+            return
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1)
+            self.peak = max(self.peak, self.limit)
+            self.increases += 1
+            self._successes = 0
+            log.debug("%s: limit up to %d.", self.name, self.limit)
+            self._wake()
+
+    async def run(self, aw):
+        "Await `aw` once the limit allows, and adapt the limit afterwards."
+        await self.acquire()
+        return await self._run(aw)
+
+    async def _run(self, aw):
+        # with a slot acquired, released when done
+        held = _HeldBack()
+        token = _held_back.set(held)
+        started = time.perf_counter()
+        try:
+            result = await aw
+        except Exception as e:
+            self.record(time.perf_counter() - started - held.seconds, e)
+            raise
+        else:
+            self.record(time.perf_counter() - started - held.seconds)
+            return result
+        finally:
+            _held_back.reset(token)
+            self.release()
+
+    async def map(self, func, items):
+        """Return `[await func(item) for item in items]`, running as many
+        as the limit allows at once.
+
+        `max_limit` workers take turns getting the next item once they got
+        a slot, so only the items running are started, however many there
+        are. The first exception is raised, the remaining items dropped.
+        """
+        items = enumerate(items)
+        results = {}
+
+        async def worker():
+            while True:
+                await self.acquire()
+                try:
+                    i, item = next(items)
+                    aw = func(item)
+                except StopIteration:
+                    self.release()
+                    return
+                except BaseException:
+                    self.release()
+                    raise
+                results[i] = await self._run(aw)
+
+        workers = [asyncio.ensure_future(worker())
+                   for _ in range(self.max_limit)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for w in workers:
+                w.cancel()
+        return [results[i] for i in range(len(results))]
+
+    def stats(self):
+        return {
+            "limit": int(self.limit),
+            "peak": int(self.peak),
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "baseline": self.baseline,
+        }
+
+    def format(self):
+        s = self.stats()
+        baseline = ("-" if s["baseline"] is None
+                    else f"{s['baseline'] * 1000:.0f}")
+        return (f"{self.name}: limit {s['limit']} (peak {s['peak']}), "
+                f"active {s['active']}, waiting {s['waiting']}, "
+                f"up {s['increases']}, down {s['decreases']}, "
+                f"usual latency ms {baseline}")
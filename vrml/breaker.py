@@ -0,0 +1,119 @@
+import random
+import time
+import logging
+
+__all__ = (
+    "backoff_delay",
+    "CircuitBreaker",
+)
+
+log = logging.getLogger(__name__)
+
+
+def backoff_delay(attempt, base, cap):
+    """Return the time to wait before retry number `attempt` (starting at 0).
+
+    Exponential backoff with full jitter: a random time between 0 and
+    `base * 2**attempt`, but at most `cap` seconds.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class _Circuit:
+    __slots__ = ("failures", "opened_at", "probing")
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+
+class CircuitBreaker:
+    """Circuit breaker per endpoint.
+
+    After `threshold` consecutive failed requests the circuit of an
+    endpoint opens and requests to it should fail fast. After `cooldown`
+    seconds a single probe request is let through (half-open). If it
+    succeeds the circuit closes again, otherwise it stays open for another
+    `cooldown`.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, threshold=5, cooldown=30) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._circuits = {}
+
+    def _get(self, key):
+        circuit = self._circuits.get(key, None)
+        if circuit is None:
+            circuit = _Circuit()
+            self._circuits[key] = circuit
+        return circuit
+
+    def state(self, key):
+        circuit = self._circuits.get(key, None)
+        if circuit is None or circuit.opened_at is None:
+            return self.CLOSED
+        if (circuit.probing
+                or time.monotonic() - circuit.opened_at >= self.cooldown):
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def failures(self, key):
+        "Number of failed requests for `key` since the last successful one."
+        circuit = self._circuits.get(key, None)
+        return 0 if circuit is None else circuit.failures
+
+    def retry_at(self, key):
+        "Return the UNIX time the circuit of `key` will be half-open."
+        circuit = self._get(key)
+        if circuit.opened_at is None:
+            return time.time()
+        return time.time() + circuit.opened_at + self.cooldown \
+               - time.monotonic()
+
+    def allow(self, key):
+        """Whether a request for `key` may be sent. In half-open state only
+        the first caller is allowed to probe."""
+        circuit = self._circuits.get(key, None)
+        if circuit is None or circuit.opened_at is None:
+            return True
+        if circuit.probing:
+            return False
+        if time.monotonic() - circuit.opened_at < self.cooldown:
+            return False
+        log.info(f"Circuit for {key} is half-open. Probing...")
+        circuit.probing = True
+        return True
+
+    def success(self, key):
+        circuit = self._circuits.get(key, None)
+        if circuit is None:
+            return
+        if circuit.opened_at is not None:
+            log.info(f"Circuit for {key} closed again.")
+        circuit.failures = 0
+        circuit.opened_at = None
+        circuit.probing = False
+
+    def failure(self, key):
+        circuit = self._get(key)
+        circuit.failures += 1
+        if circuit.probing or (circuit.opened_at is None
+                               and circuit.failures >= self.threshold):
+            log.warning(f"Circuit for {key} opened after "
+                        f"{circuit.failures} failed requests.")
+            circuit.opened_at = time.monotonic()
+            circuit.probing = False
+
+    def abort(self, key):
+        "A probe ended without result, e.g. it was cancelled. Allow another."
+        circuit = self._circuits.get(key, None)
+        if circuit is not None:
+            circuit.probing = False
+
+    def states(self):
+        return {key: self.state(key) for key in self._circuits}
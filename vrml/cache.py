@@ -0,0 +1,462 @@
+from collections import OrderedDict
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import math
+import os
+import time
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = (
+    "ResponseCache",
+    "NegativeCache",
+    "DiskCache",
+    "fingerprint",
+)
+
+log = logging.getLogger(__name__)
+
+if orjson is not None:
+    _loads, _dumps = orjson.loads, orjson.dumps
+else:
+    _loads = json.loads
+    _dumps = lambda obj: json.dumps(obj).encode("utf-8")
+
+
+def fingerprint(data):
+    """Hash of the decoded JSON `data`, equal for equal data within a
+    process. Tells whether a response changed without comparing it."""
+    return hash(_dumps(data))
+
+
+def _ttl(ttls, path, data):
+    """TTL of the response `data` of the endpoint `path`, `None` if it
+    isn't cached."""
+    ttl = ttls.get(path, None)
+    if callable(ttl):
+        ttl = ttl(data)
+    return ttl
+
+
+class _Entry:
+    __slots__ = ("path", "url", "data", "expires", "fetched_at")
+
+    def __init__(self, path, url, data, expires, fetched_at) -> None:
+        self.path = path
+        self.url = url
+        self.data = data
+        self.expires = expires          # in `time.monotonic` time
+        self.fetched_at = fetched_at    # UNIX time
+
+
+class ResponseCache:
+    """In-memory cache for decoded API responses.
+
+    Entries expire after the TTL configured for their endpoint in `ttls`
+    (keyed by the route's path, e.g. `"/Teams/{team_id}"`), either in
+    seconds or as a function of the response data returning seconds.
+    Endpoints without a TTL are not cached. If more than `max_size` entries are
+    stored, the least recently used ones are evicted. Expired entries are
+    kept until evicted, so they can still be served with `get_stale` when
+    the API is down.
+
+    Responses of bulk jobs (`set(..., bulk=True)`) are each only used
+    once. At most `max_bulk` of them are kept, the oldest ones are evicted
+    first, so a bulk job doesn't evict everything else. They are kept like
+    any other entry once they are used again.
+    """
+    def __init__(self, ttls, max_size=1000, max_bulk=100) -> None:
+        self.ttls = ttls
+        self.max_size = max_size
+        self.max_bulk = max_bulk
+        self._entries = OrderedDict()
+        self._bulk = OrderedDict()  # keys of unused bulk entries, oldest first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def is_cached(self, path):
+        "Whether responses of the endpoint `path` are cached at all."
+        return bool(self.ttls.get(path, None))
+
+    def get(self, key):
+        """Return the cached data for `key` or `None`.
+
+        The returned data is shared, copy it before modifying.
+        """
+        entry = self._entries.get(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires <= time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._bulk.pop(key, None)
+        self.hits += 1
+        return entry.data
+
+    def get_stale(self, key, max_stale=math.inf):
+        """Return the cache entry for `key` even if it expired less than
+        `max_stale` seconds ago, or `None`. Its `data` and `fetched_at`
+        (UNIX time) attributes are of interest.
+        """
+        entry = self._entries.get(key, None)
+        if entry is None or entry.expires + max_stale <= time.monotonic():
+            return None
+        return entry
+
+    def expiring(self, within):
+        """Return `(key, entry)` of the entries that are fresh, but expire
+        in the next `within` seconds."""
+        now = time.monotonic()
+        return [(k, e) for k, e in self._entries.items()
+                if now < e.expires <= now + within]
+
+    def set(self, key, path, url, data, ttl=None, fetched_at=None,
+            bulk=False):
+        """Store `data` if the endpoint `path` is cached. `ttl` overrides
+        the endpoint's TTL, it may be negative to store already expired
+        data. `fetched_at` is the UNIX time the data came from the API,
+        default now. `bulk` marks responses of bulk jobs, unless `key` is
+        cached already for something else."""
+        if ttl is None:
+            ttl = _ttl(self.ttls, path, data)
+        if not ttl:
+            return
+        if fetched_at is None:
+            fetched_at = time.time()
+        if bulk and (key not in self._entries or key in self._bulk):
+            self._bulk[key] = None
+            self._bulk.move_to_end(key)
+        self._entries[key] = _Entry(path, url, data, time.monotonic() + ttl,
+                                    fetched_at)
+        self._entries.move_to_end(key)
+        while len(self._bulk) > self.max_bulk:
+            del self._entries[self._bulk.popitem(last=False)[0]]
+            self.evictions += 1
+        while len(self._entries) > self.max_size:
+            self._bulk.pop(self._entries.popitem(last=False)[0], None)
+            self.evictions += 1
+
+    def invalidate(self, path=None, url=None):
+        """Drop all entries matching the endpoint `path` and/or `url`.
+        Without arguments nothing is dropped, use `clear` for that.
+
+        Returns the number of dropped entries.
+        """
+        if path is None and url is None:
+            return 0
+        keys = [k for k, e in self._entries.items()
+                if (path is None or e.path == path)
+                and (url is None or e.url == url)]
+        for k in keys:
+            del self._entries[k]
+            self._bulk.pop(k, None)
+        log.debug("Invalidated %d cache entries for %s %s", len(keys), path,
+                  url)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._bulk.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bulk": len(self._bulk),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class NegativeCache:
+    """Short lived cache for requests that came back empty, like searches
+    without results or entities the API returns `null` for.
+
+    Empty results are remembered for `ttl` seconds. `null` is returned for
+    existing entities once in a while too, so it's only remembered after
+    `null_threshold` `null`s in a row. At most `max_size` entries are
+    kept, least recently used ones are evicted.
+    """
+    def __init__(self, ttl=120, null_threshold=2, max_size=1000) -> None:
+        self.ttl = ttl
+        self.null_threshold = null_threshold
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._nulls = {}    # `null`s in a row per key
+        self.hits = 0
+        self.added = 0
+        self.invalidated = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cache entry for `key` if the request is known to come
+        back empty, otherwise `None`. The entry's `data` is shared, copy it
+        before modifying."""
+        entry = self._entries.get(key, None)
+        if entry is None:
+            return None
+        if entry.expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def add(self, key, path, url, data):
+        """Remember that the request `key` came back with the empty result
+        `data`. `None` is only remembered if it came back often enough.
+
+        Returns whether it's remembered.
+        """
+        if data is None:
+            nulls = self._nulls.get(key, 0) + 1
+            if nulls < self.null_threshold:
+                self._nulls[key] = nulls
+                return False
+        self._nulls.pop(key, None)
+        self._entries[key] = _Entry(path, url, data,
+                                    time.monotonic() + self.ttl, time.time())
+        self._entries.move_to_end(key)
+        self.added += 1
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        while len(self._nulls) > self.max_size:
+            del self._nulls[next(iter(self._nulls))]
+        return True
+
+    def discard(self, key):
+        "Forget about `key`, e.g. because it came back with data."
+        self._nulls.pop(key, None)
+        if self._entries.pop(key, None) is not None:
+            self.invalidated += 1
+
+    def invalidate(self, path=None, match=None):
+        """Drop entries of the endpoint `path` (all without) for whose key
+        `match(key)` returns true, if given.
+
+        Returns the number of dropped entries.
+        """
+        keys = [k for k, e in self._entries.items()
+                if (path is None or e.path == path)
+                and (match is None or match(k))]
+        for k in keys:
+            del self._entries[k]
+        self.invalidated += len(keys)
+        if path is None and match is None:
+            self._nulls.clear()
+        return len(keys)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "added": self.added,
+            "invalidated": self.invalidated,
+        }
+
+
+class DiskCache:
+    """Persistent cache for API responses, surviving restarts.
+
+    Every response is stored as a JSON file in `path`, together with its
+    `ETag` and `Last-Modified` headers if the API sent them. Entries are
+    fresh for the TTL configured for their endpoint in `ttls`. Expired
+    entries with validators can be revalidated with a conditional request,
+    others are kept for `max_stale` seconds to serve outdated data from
+    and then dropped.
+
+    At most `max_entries` entries are stored, the least recently written
+    ones are removed when new ones are. Entries written before `prune` was
+    called aren't counted.
+    """
+    def __init__(self, path, ttls, max_entries=10000, max_stale=0) -> None:
+        self.path = Path(path)
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self._files = OrderedDict()     # names of stored files, oldest first
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, key):
+        name = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return self.path / f"{name}.json"
+
+    def _read(self, key):
+        try:
+            with open(self._file(key), "rb") as f:
+                entry = _loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            log.warning(f"Can't read disk cache entry for {key}.",
+                        exc_info=True)
+            return None
+        if not self._keep(entry):
+            self._remove(key)
+            return None
+        return entry
+
+    def _keep(self, entry):
+        "Whether `entry` is still of use."
+        return (entry.get("expires", 0) + self.max_stale > time.time()
+                or entry.get("etag", None)
+                or entry.get("last_modified", None))
+
+    def _write(self, key, entry, evicted=()):
+        file = self._file(key)
+        tmp = file.with_suffix(".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_dumps(entry))
+            os.replace(tmp, file)
+        except OSError:
+            log.warning(f"Can't write disk cache entry for {key}.",
+                        exc_info=True)
+        for name in evicted:
+            try:
+                os.remove(self.path / name)
+            except OSError:
+                pass
+
+    def _track(self, key):
+        """Count the file of `key` as written and return the names of the
+        files to remove to stay within `max_entries`."""
+        name = self._file(key).name
+        self._files[name] = None
+        self._files.move_to_end(name)
+        evicted = []
+        while len(self._files) > self.max_entries:
+            evicted.append(self._files.popitem(last=False)[0])
+        self.evictions += len(evicted)
+        return evicted
+
+    def _remove(self, key):
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    async def get(self, key):
+        """Return the stored entry for `key` or `None`.
+
+        An entry is a `dict` with the keys `data`, `etag`, `last_modified`,
+        `fetched_at` and `expires` (UNIX timestamps). It may be expired,
+        check with `is_fresh`.
+        """
+        entry = await asyncio.to_thread(self._read, key)
+        if entry is None:
+            self._files.pop(self._file(key).name, None)
+            self.misses += 1
+        elif self.is_fresh(entry):
+            self.hits += 1
+        return entry
+
+    @staticmethod
+    def is_fresh(entry, max_stale=0):
+        """Whether `entry` didn't expire yet, or expired less than
+        `max_stale` seconds ago."""
+        return entry["expires"] + max_stale > time.time()
+
+    def fetched_at(self, entry):
+        "UNIX time the data of `entry` was fetched from the API."
+        fetched_at = entry.get("fetched_at", None)
+        if fetched_at is None:
+            # entries written by older versions don't have it
+            ttl = _ttl(self.ttls, entry["path"], entry["data"])
+            fetched_at = entry["expires"] - (ttl or 0)
+        return fetched_at
+
+    @staticmethod
+    def validators(entry):
+        "Return the headers for a conditional request revalidating `entry`."
+        headers = {}
+        if entry.get("etag", None):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified", None):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    async def set(self, key, path, data, headers=None):
+        """Store `data` if the endpoint `path` is cached. `headers` are the
+        response headers to take validators from."""
+        ttl = _ttl(self.ttls, path, data)
+        if not ttl:
+            return
+        headers = headers or {}
+        now = time.time()
+        entry = {
+            "path": path,
+            "fetched_at": now,
+            "expires": now + ttl,
+            "etag": headers.get("ETag", None),
+            "last_modified": headers.get("Last-Modified", None),
+            "data": data,
+        }
+        await asyncio.to_thread(self._write, key, entry, self._track(key))
+
+    async def refresh(self, key, entry):
+        "Mark `entry` as fresh again after it was revalidated."
+        self.revalidations += 1
+        ttl = _ttl(self.ttls, entry["path"], entry["data"])
+        entry["fetched_at"] = time.time()
+        entry["expires"] = entry["fetched_at"] + (ttl or 0)
+        await asyncio.to_thread(self._write, key, entry, self._track(key))
+
+    def prune(self):
+        """Remove expired entries that can't be revalidated or served any
+        longer and the oldest entries exceeding `max_entries`. Does blocking
+        I/O, so call it at startup or in a thread.
+        """
+        files = []
+        for file in self.path.glob("*.json"):
+            try:
+                files.append((file.stat().st_mtime, file))
+            except OSError:
+                continue
+        files.sort(reverse=True)
+        removed = 0
+        kept = []
+        for i, (_, file) in enumerate(files):
+            if i < self.max_entries:
+                try:
+                    with open(file, "rb") as f:
+                        entry = _loads(f.read())
+                    if self._keep(entry):
+                        kept.append(file.name)
+                        continue
+                except (OSError, ValueError):
+                    pass
+            try:
+                os.remove(file)
+                removed += 1
+            except OSError:
+                pass
+        self._files = OrderedDict.fromkeys(reversed(kept))
+        log.info(f"Pruned {removed} entries from disk cache {self.path}.")
+        return removed
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+        }
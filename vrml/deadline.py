@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+import contextvars
+import asyncio
+import math
+import time
+
+__all__ = (
+    "Deadline",
+    "SharedDeadline",
+    "DeadlineExceeded",
+    "current_deadline",
+    "deadline",
+    "remaining",
+    "within",
+    "gather",
+)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    "The time budget of the current context ran out."
+
+
+class Deadline:
+    """Point in time work has to be done by, e.g. the time Discord stops
+    waiting for a command's response. Can be extended, which affects
+    everyone sharing the deadline."""
+    def __init__(self, seconds=math.inf) -> None:
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def extend(self, seconds):
+        "Make sure there are at least `seconds` left."
+        self.expires = max(self.expires, time.monotonic() + seconds)
+
+
+class SharedDeadline(Deadline):
+    """Deadline of work done for several callers, it lasts as long as the
+    latest of their deadlines. Callers without a deadline wait forever."""
+    def __init__(self) -> None:
+        self._deadlines = []
+
+    @property
+    def expires(self):
+        if not self._deadlines:
+            return math.inf
+        return max(math.inf if d is None else d.expires
+                   for d in self._deadlines)
+
+    def add(self, deadline):
+        self._deadlines.append(deadline)
+
+    def remove(self, deadline):
+        self._deadlines.remove(deadline)
+
+    def extend(self, seconds):
+        raise TypeError("Extend the deadlines of the callers instead.")
+
+
+current_deadline = contextvars.ContextVar("vrml_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds):
+    """Give all requests made within the block a budget of `seconds`.
+
+    Tasks created within the block share the deadline.
+    """
+    token = current_deadline.set(Deadline(seconds))
+    try:
+        yield current_deadline.get()
+    finally:
+        current_deadline.reset(token)
+
+
+def remaining():
+    "Seconds left of the current deadline, `None` if there is none."
+    d = current_deadline.get()
+    return None if d is None else d.remaining()
+
+
+async def within(aw, deadline=None):
+    """Await `aw`, but cancel it and raise `DeadlineExceeded` if `deadline`
+    (default: the current one) expires first."""
+    if deadline is None:
+        deadline = current_deadline.get()
+    if deadline is None or deadline.expires == math.inf:
+        return await aw
+    left = deadline.remaining()
+    if left <= 0:
+        if asyncio.iscoroutine(aw):
+            aw.close()
+        else:
+            asyncio.ensure_future(aw).cancel()
+        raise DeadlineExceeded()
+    try:
+        return await asyncio.wait_for(aw, left)
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceeded() from e
+
+
+async def gather(*aws):
+    """Like `asyncio.gather`, but all awaitables are cancelled when the
+    current deadline expires and `DeadlineExceeded` is raised."""
+    return await within(asyncio.gather(*aws))
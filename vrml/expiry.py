@@ -0,0 +1,91 @@
+from datetime import datetime
+import time
+import logging
+
+__all__ = (
+    "by_schedule",
+    "team_dates",
+    "player_dates",
+    "game_dates",
+)
+
+log = logging.getLogger(__name__)
+
+# Seconds after a match's scheduled start its results are expected.
+MATCH_RESULTS_DUE = 90 * 60
+# Seconds after that results are polled for if they aren't in yet.
+MATCH_RESULTS_LATE = 6 * 60 * 60
+
+
+def _timestamp(value):
+    "UNIX time of a UTC date string of the API, `None` if not a date."
+    if not value or value == "TBD":
+        return None
+    try:
+        return datetime.fromisoformat(value + "+00:00").timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _season_dates(season):
+    "Dates a season changes at, e.g. when the championship starts."
+    for key in ("dateStartUTC", "dateChampionshipStartUTC", "dateEndUTC"):
+        t = _timestamp((season or {}).get(key, None))
+        if t is not None:
+            yield t
+
+
+def _match_dates(matches, now):
+    "Dates results of `matches` are due at."
+    for match in matches or []:
+        t = _timestamp(match.get("dateScheduledUTC", None))
+        if t is None:
+            continue
+        due = t + MATCH_RESULTS_DUE
+        if due <= now < due + MATCH_RESULTS_LATE:
+            # results are late, could come in any time
+            yield now
+        else:
+            yield due
+
+
+def team_dates(data, now):
+    "Dates a `/Teams/{team_id}` response changes at."
+    team = data.get("team", None) or {}
+    yield from _season_dates(data.get("season", None))
+    yield from _match_dates(team.get("upcomingMatches", None), now)
+
+
+def player_dates(data, now):
+    "Dates a `/Players/{player_id}/Detailed` response changes at."
+    bio = (data.get("thisGame", None) or {}).get("bioCurrent", None) or {}
+    yield from _season_dates(bio)
+    t = _timestamp(bio.get("cooldownDateExpiresUTC", None))
+    if t is not None:
+        yield t
+
+
+def game_dates(data, now):
+    "Dates a `/{game}` response changes at."
+    yield from _season_dates(data.get("season", None))
+    yield from _match_dates(data.get("nextMatches", None), now)
+
+
+def by_schedule(dates, min_ttl, max_ttl):
+    """Return a function computing the TTL of a response, to be used in
+    place of a fixed TTL.
+
+    `dates(data, now)` yields the UNIX times the response is expected to
+    change at. The response is cached until the next of them, but at least
+    `min_ttl` and at most `max_ttl` seconds.
+    """
+    def ttl(data):
+        now = time.time()
+        try:
+            upcoming = [t for t in dates(data, now) if t >= now]
+        except (AttributeError, TypeError):
+            log.debug("Unexpected data, using the min. TTL.", exc_info=True)
+            return min_ttl
+        next_change = min(upcoming, default=now + max_ttl)
+        return max(min_ttl, min(max_ttl, next_change - now))
+    return ttl
@@ -0,0 +1,69 @@
+import logging
+
+__all__ = (
+    "Hedging",
+)
+
+log = logging.getLogger(__name__)
+
+
+class _Budget:
+    __slots__ = ("tokens",)
+
+    def __init__(self, tokens) -> None:
+        self.tokens = tokens
+
+
+class Hedging:
+    """Decides when to send a second, identical request if the first one
+    is slow (hedging), to cut off the latency tail of an endpoint.
+
+    Only endpoints in `paths` are hedged. A request is hedged once it took
+    longer than the `percentile` of the endpoint's recent latencies, so
+    roughly `100 - percentile` percent of requests would qualify. The
+    extra traffic is capped by `budget`: every request earns `budget`
+    hedges, up to a burst of `max_burst`, and every hedge spends one. With
+    a budget of 0 nothing is hedged.
+    """
+    def __init__(self, paths, budget=0.05, percentile=90, min_samples=20,
+                 default_delay=1.0, min_delay=0.05, max_burst=5) -> None:
+        self.paths = set(paths)
+        self.budget = budget
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay  # until enough samples are in
+        self.min_delay = min_delay
+        self.max_burst = max_burst
+        self._budgets = {}
+
+    def applies(self, path):
+        return self.budget > 0 and path in self.paths
+
+    def _get(self, path):
+        budget = self._budgets.get(path, None)
+        if budget is None:
+            budget = _Budget(min(1.0, self.max_burst))
+            self._budgets[path] = budget
+        return budget
+
+    def earn(self, path):
+        "Count a request to `path` towards the budget."
+        budget = self._get(path)
+        budget.tokens = min(self.max_burst, budget.tokens + self.budget)
+
+    def delay(self, latencies):
+        """Seconds to wait for the first request before hedging, based on
+        the endpoint's `Latencies`."""
+        if len(latencies) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, latencies.percentile(self.percentile))
+
+    def spend(self, path):
+        """Take a hedge from the budget of `path`. Returns `False` if it's
+        used up."""
+        budget = self._get(path)
+        if budget.tokens < 1:
+            log.debug("Hedging budget for %s is used up.", path)
+            return False
+        budget.tokens -= 1
+        return True
@@ -1,19 +1,156 @@
 import logging
+import os
 from urllib.parse import quote
 import aiohttp
 import json
 import asyncio
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from vrml.season import Season
+from vrml.ratelimit import RateLimiter
+from vrml.cache import ResponseCache, NegativeCache, DiskCache
+from vrml.breaker import CircuitBreaker, backoff_delay
+from vrml.metrics import Metrics
+from vrml.hedge import Hedging
+from vrml.expiry import by_schedule, game_dates, player_dates, team_dates
+from vrml.search import SearchCache, normalize_query
+from vrml.popularity import Popularity
+from vrml.adaptive import AdaptiveLimiter, held_back
+from vrml.scheduler import (Scheduler, INTERACTIVE, BACKGROUND,
+                            current_priority, priority, current_guild, guild)
+from vrml.deadline import (Deadline, SharedDeadline, DeadlineExceeded,
+                           current_deadline, deadline, remaining, within,
+                           gather)
 
 log = logging.getLogger(__name__)
 
+# Options for the connector of the shared session. Connections to the API
+# are kept alive and reused, DNS lookups are cached.
+CONNECTOR_OPTIONS = {
+    "limit": 50,                # total simultaneous connections
+    "limit_per_host": 20,       # connections to api.vrmasterleague.com
+    "ttl_dns_cache": 300,       # seconds
+    "keepalive_timeout": 60,    # seconds an idle connection is kept open
+    "enable_cleanup_closed": True,
+}
+
+_session = None
+_refresher = None   # task refreshing popular responses, see `start`
+
+# parses JSON straight from the response body bytes
+_loads = orjson.loads if orjson is not None else json.loads
+
+# request counts, status codes, latencies etc. per endpoint
+metrics = Metrics()
+
+rate_limiter = RateLimiter()
+
+# Requests failing with a server error or connection problem are retried
+# `RETRIES` times with exponential backoff (see `breaker.backoff_delay`).
+# Being rate limited doesn't count as failure, but no request is sent more
+# than `MAX_TRIES` times.
+RETRIES = 3
+BACKOFF_BASE = 0.5      # seconds
+BACKOFF_MAX = 10        # seconds
+MAX_TRIES = 10
+# Max. seconds for a single request. Requests are given less time if less
+# is left of the current deadline, see `deadline`.
+REQUEST_TIMEOUT = 30
+
+breaker = CircuitBreaker(threshold=5, cooldown=30)
+
+# Endpoints where a slow request gets a second one sent alongside it, the
+# first answer wins. Only the HTTP request itself is timed, not waiting
+# for a slot, the rate limit or a retry. At most 5% extra requests, only
+# while the rate limit has tokens to spare and the endpoint doesn't fail.
+HEDGED_PATHS = (
+    "/Players/{player_id}/Detailed",
+    "/Teams/{team_id}",
+)
+HEDGE_RESERVE = 5       # rate limit tokens to leave untouched
+hedging = Hedging(HEDGED_PATHS, budget=0.05, percentile=90)
+
+# Requests in flight are limited and handed out by priority, interactive
+# requests first. Use `priority(BACKGROUND)` for bulk work.
+scheduler = Scheduler(max_active=CONNECTOR_OPTIONS["limit_per_host"],
+                      max_background=16,
+                      max_per_guild=CONNECTOR_OPTIONS["limit_per_host"] // 2)
+# tokens of each rate limit window background requests leave for
+# interactive ones
+BACKGROUND_RESERVE = 2
+# ... and guilds with many requests in flight leave for the others
+BUSY_GUILD_RESERVE = 4
+
+# concurrency limits of bulk jobs, see `limiter`
+limiters = {}
+
+# identical GET requests currently on their way, see `request`
+_in_flight = {}
+
+# Seconds responses of an endpoint are cached for. Endpoints not listed
+# here are not cached. Teams, players and games change around their
+# matches and season dates, so they are cached until the next of those,
+# within bounds.
+CACHE_TTLS = {
+    "/Players/Search": 10 * 60,
+    "/{game}": by_schedule(game_dates, 5 * 60, 60 * 60),
+    "/{game}/Players": 60 * 60,
+    "/Players/{player_id}/Detailed": by_schedule(player_dates, 60 * 60,
+                                                 6 * 60 * 60),
+    "/Teams/{team_id}": by_schedule(team_dates, 5 * 60, 24 * 60 * 60),
+    "/{game}/Teams/Search": 10 * 60,
+    "/Matches/{match_id}/Sets": 60 * 60,
+}
+
+# Seconds past expiry a cached response is still returned right away,
+# while it's refreshed in the background ...
+STALE_WHILE_REVALIDATE = 60 * 60
+# ... and while the API is unavailable or its circuit is open.
+MAX_STALE = 7 * 24 * 60 * 60
+
+# Responses of background requests that aren't refreshes (bulk jobs like
+# the crawl) get a small part of it, see `ResponseCache`.
+cache = ResponseCache(CACHE_TTLS, max_size=1000, max_bulk=100)
+# Search results, reused for narrower searches. Results with 100 or more
+# entries are assumed to be cut off by the API.
+search_cache = SearchCache(ttl=10 * 60, max_size=200, limit=100)
+# Requests that came back empty: searches without results and `null`
+# bodies, the latter only after 2 in a row.
+negative_cache = NegativeCache(ttl=2 * 60, null_threshold=2)
+
+# Popular responses are refreshed in the background shortly before they
+# expire, so they don't expire for users. Checked every `REFRESH_INTERVAL`
+# seconds, responses requested `REFRESH_MIN_SCORE` times within about half
+# an hour are refreshed `REFRESH_AHEAD` seconds before they expire, at most
+# `REFRESH_MAX` at a time.
+popularity = Popularity(half_life=30 * 60)
+REFRESH_INTERVAL = 30
+REFRESH_AHEAD = 60
+REFRESH_MIN_SCORE = 3
+REFRESH_MAX = 10
+disk_cache = None   # see `use_disk_cache`
+
+# returned by `_request` if a conditional request came back with 304
+_NOT_MODIFIED = object()
+
 
 class HTTPException(Exception):
     def __init__(self, msg, route=None, response=None) -> None:
-        pass
+        super().__init__(msg)
+        self.route = route
+        self.response = response
+
+class HTTPUnavailable(HTTPException):
+    """The API failed with server errors or couldn't be reached, even after
+    retrying."""
+
 
-class HTTPServiceUnavailable(HTTPException):
+class HTTPServiceUnavailable(HTTPUnavailable):
     def __init__(self, route, response):
         self.route = route
         self.response = response
@@ -25,8 +162,21 @@ class HTTPServiceUnavailable(HTTPException):
         return self.message
 
 
+class HTTPCircuitOpen(HTTPServiceUnavailable):
+    "Raised without sending a request while the endpoint's circuit is open."
+    def __init__(self, route, retry_at):
+        self.route = route
+        self.response = None
+        self.retry_at = retry_at
+        self.message = (f"{route.method} {route.url} is not available. Too "
+                        f"many failed requests to {route.path}, not trying "
+                        f"again for {retry_at - time.time():.0f} seconds.")
+        HTTPException.__init__(self, self.message, route)
+
+
 class Route:
-    BASE = 'https://api.vrmasterleague.com'
+    # can be pointed to a stand-in, see `tools/standin.py`
+    BASE = os.environ.get("VRML_API_BASE", 'https://api.vrmasterleague.com')
 
     def __init__(self, method, path, **parameters):
         self.method = method
@@ -39,42 +189,525 @@ class Route:
             self.url = url
 
 
+async def start():
+    """Create the shared `aiohttp.ClientSession` if it doesn't exist yet.
+
+    All requests go through this session, so connections to the API are
+    pooled and kept alive instead of doing a new handshake for every
+    request. Must be called from within the running event loop.
+    """
+    global _session, _refresher
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(**CONNECTOR_OPTIONS)
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"Accept-Encoding": "gzip, deflate"},
+            auto_decompress=True)
+        log.debug("Opened new HTTP session.")
+    if _refresher is None or _refresher.done():
+        _refresher = asyncio.ensure_future(_refresh_popular())
+    return _session
+
+
+async def close():
+    "Close the shared session and all pooled connections."
+    global _session, _refresher
+    if _refresher is not None:
+        _refresher.cancel()
+        _refresher = None
+    if _session is not None and not _session.closed:
+        await _session.close()
+        log.debug("Closed HTTP session.")
+    _session = None
+
+
+class StaleData(dict):
+    """Response data served from the cache after it expired. `fetched_at`
+    is the UNIX time it was fetched from the API. `failed` is set if it's
+    served because asking the API just failed."""
+    def __init__(self, data, fetched_at, failed=False) -> None:
+        super().__init__(data)
+        self.fetched_at = fetched_at
+        self.failed = failed
+
+
+def cached_at(data):
+    """If `data` is outdated, return the UNIX time it was fetched from the
+    API, otherwise `None`. Only responses that are objects are marked."""
+    return getattr(data, "fetched_at", None)
+
+
+def _stale(data, fetched_at, failed=False):
+    if isinstance(data, dict):
+        return StaleData(data, fetched_at, failed)
+    return data
+
+
+def _stale_limit(path):
+    "Seconds past expiry responses of `path` may be served right now."
+    if breaker.state(path) != breaker.CLOSED:
+        return MAX_STALE
+    return STALE_WHILE_REVALIDATE
+
+
+class _Flight:
+    "A request in flight, shared by everyone waiting for its result."
+    def __init__(self, task, deadline) -> None:
+        self.task = task
+        self.deadline = deadline
+        self.waiters = 0
+
+
+def _copy(data):
+    "Copy decoded JSON data, faster than `copy.deepcopy`."
+    if isinstance(data, dict):
+        copy = {k: _copy(v) for k, v in data.items()}
+        if isinstance(data, StaleData):
+            return StaleData(copy, data.fetched_at, data.failed)
+        return copy
+    if isinstance(data, list):
+        return [_copy(v) for v in data]
+    return data
+
+
+def _request_key(route, params):
+    params = tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+    return (route.method, route.url, params)
+
+
+def _flight_done(key, task):
+    _in_flight.pop(key, None)
+    if not task.cancelled():
+        task.exception()    # mark as retrieved, waiters may be gone
+
+
 async def request(route, **kwargs):
+    """Request data from the API and return the decoded JSON.
+
+    Responses of GET requests are cached according to `CACHE_TTLS` and
+    identical GET requests that are in flight at the same time are only
+    sent once. Every caller gets its own copy of the data.
+
+    Expired responses are still returned for `STALE_WHILE_REVALIDATE`
+    seconds and refreshed in the background, for `MAX_STALE` seconds if
+    the API is unavailable. Use `cached_at` to tell.
+
+    If the current context has a deadline, `DeadlineExceeded` is raised
+    once it expires.
+    """
+    if route.method != "GET" or kwargs.keys() - {"params"}:
+        data, _ = await _request(route, **kwargs)
+        return data
+    
+    key = _request_key(route, kwargs.get("params", None))
+    # bulk jobs would push what users ask for out of `popularity`
+    counted = current_priority.get() != BACKGROUND
+    if counted and cache.is_cached(route.path):
+        popularity.touch(key, (route, kwargs))
+    data = cache.get(key)
+    if data is not None:
+        log.debug("Cache hit for %s %s", route.method, route.url)
+        if counted:
+            popularity.hit(key)
+        return _copy(data)
+    if counted:
+        popularity.miss(key)
+    entry = cache.get_stale(key, _stale_limit(route.path))
+    if entry is not None:
+        log.debug("Serving outdated data for %s %s", route.method, route.url)
+        _revalidate(route, key, **kwargs)
+        return _stale(_copy(entry.data), entry.fetched_at)
+    entry = negative_cache.get(key)
+    if entry is not None:
+        log.debug("Known to be empty: %s %s", route.method, route.url)
+        return _copy(entry.data)
+
+    flight = _in_flight.get(key, None)
+    if flight is None:
+        flight = _start_flight(route, key, **kwargs)
+    else:
+        log.debug("Joining request in flight: %s %s", route.method, route.url)
+    
+    caller_deadline = current_deadline.get()
+    flight.deadline.add(caller_deadline)
+    flight.waiters += 1
+    try:
+        data = await within(asyncio.shield(flight.task), caller_deadline)
+    finally:
+        flight.waiters -= 1
+        flight.deadline.remove(caller_deadline)
+        if flight.waiters == 0 and not flight.task.done():
+            # everyone gave up, don't waste requests on it
+            flight.task.cancel()
+    if isinstance(data, StaleData) and not data.failed:
+        # outdated data from the disk cache, the API wasn't asked yet
+        _revalidate(route, key, **kwargs)
+    if flight.waiters == 0 and not cache.is_cached(route.path):
+        # the last one to get uncached data can have the original
+        return data
+    return _copy(data)
+
+
+def _start_flight(route, key, revalidate=False, **kwargs):
+    # the shared request may take as long as its most patient waiter
+    shared_deadline = SharedDeadline()
+    task = asyncio.ensure_future(
+        _fetch(route, key, shared_deadline, revalidate, **kwargs))
+    flight = _Flight(task, shared_deadline)
+    _in_flight[key] = flight
+    task.add_done_callback(lambda t: _flight_done(key, t))
+    return flight
+
+
+async def _refresh_popular():
+    "Refresh popular responses before they expire, runs forever."
+    while True:
+        await asyncio.sleep(REFRESH_INTERVAL)
+        expiring = dict(cache.expiring(REFRESH_INTERVAL + REFRESH_AHEAD))
+        hottest = popularity.hottest(expiring, REFRESH_MIN_SCORE, REFRESH_MAX)
+        for key, (route, kwargs) in hottest:
+            if (key in _in_flight
+                    or breaker.state(route.path) != breaker.CLOSED):
+                continue
+            log.debug("Refreshing popular %s %s", route.method, route.url)
+            popularity.refreshed(key, expiring[key].expires)
+            with priority(BACKGROUND):
+                _start_flight(route, key, revalidate=True, **kwargs)
+
+
+def _revalidate(route, key, **kwargs):
+    "Refresh the outdated response for `key` in the background."
+    if key in _in_flight or breaker.state(route.path) == breaker.OPEN:
+        return
+    log.debug("Refreshing %s %s in the background.", route.method, route.url)
+    with priority(BACKGROUND):
+        _start_flight(route, key, revalidate=True, **kwargs)
+
+
+async def _fetch(route, key, deadline, revalidate=False, **kwargs):
+    """Get the response for `key` from the disk cache or the API.
+    
+    If `revalidate` is set, the API is always asked, with a conditional
+    request if possible. Otherwise outdated responses from the disk cache
+    may be returned, they have to be refreshed then.
+    """
+    current_deadline.set(deadline)
+    # bulk jobs mustn't push everything else out of the memory and disk
+    # cache
+    bulk = not revalidate and current_priority.get() == BACKGROUND
+    entry = None
+    if disk_cache is not None:
+        entry = await disk_cache.get(key)
+    if entry is not None and not revalidate and disk_cache.is_fresh(entry):
+        log.debug("Disk cache hit for %s %s", route.method, route.url)
+        data = entry["data"]
+        cache.set(key, route.path, route.url, data,
+                  ttl=entry["expires"] - time.time(),
+                  fetched_at=disk_cache.fetched_at(entry), bulk=bulk)
+        return data
+    if (entry is not None and not revalidate
+            and disk_cache.is_fresh(entry, _stale_limit(route.path))):
+        log.debug("Outdated disk cache hit for %s %s", route.method,
+                  route.url)
+        fetched_at = disk_cache.fetched_at(entry)
+        # already expired, but can be served from memory while refreshing
+        cache.set(key, route.path, route.url, entry["data"],
+                  ttl=entry["expires"] - time.time(), fetched_at=fetched_at,
+                  bulk=bulk)
+        return _stale(entry["data"], fetched_at)
+    
+    headers = disk_cache.validators(entry) if entry is not None else {}
+    try:
+        data, response_headers = await _request(route, headers=headers,
+                                                **kwargs)
+    except HTTPUnavailable as e:
+        # serve outdated data rather than nothing
+        stale = cache.get_stale(key, MAX_STALE)
+        if stale is not None:
+            data = _stale(stale.data, stale.fetched_at, failed=True)
+        elif entry is not None and disk_cache.is_fresh(entry, MAX_STALE):
+            data = _stale(entry["data"], disk_cache.fetched_at(entry),
+                          failed=True)
+        else:
+            raise
+        log.warning(f"Serving outdated data for {route.method} {route.url}: "
+                    f"{e}")
+        return data
+    if data is None or data == []:
+        # remembered only briefly, see `negative_cache`
+        negative_cache.add(key, route.path, route.url, data)
+        return data
+    negative_cache.discard(key)
+    if data is _NOT_MODIFIED:
+        log.debug("%s %s was not modified.", route.method, route.url)
+        data = entry["data"]
+        await disk_cache.refresh(key, entry)
+    elif (data is not None and disk_cache is not None
+          and (not bulk or entry is not None)):
+        # bulk jobs only update entries that are stored already
+        await disk_cache.set(key, route.path, data, response_headers)
+    if data is not None:
+        cache.set(key, route.path, route.url, data, bulk=bulk)
+    return data
+
+
+async def _send(session, route, stats, **kwargs):
+    """Send the request once. Returns the response and its body if the
+    status is 200, `None` otherwise."""
+    started = time.perf_counter()
+    async with session.request(route.method, route.url, **kwargs) as r:
+        body = await r.read() if r.status == 200 else None
+        stats.latencies.add(time.perf_counter() - started)
+    return r, body
+
+
+async def _attempt(route, session, stats, cls, **kwargs):
+    """`_send`, but if it takes unusually long for the endpoint, send the
+    same request a second time and take whichever answers first. See
+    `hedging`. Endpoints with recent failures aren't hedged, a second
+    request wouldn't help them."""
+    if not hedging.applies(route.path) or breaker.failures(route.path):
+        return await _send(session, route, stats, **kwargs)
+    
+    hedging.earn(route.path)
+    primary = asyncio.ensure_future(_send(session, route, stats, **kwargs))
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedging.delay(
+            stats.latencies))
+        if (done or breaker.failures(route.path)
+                or not rate_limiter.spare(route.path, HEDGE_RESERVE)
+                or not hedging.spend(route.path)):
+            return await primary
+        
+        log.debug("Hedging slow request %s %s", route.method, route.url)
+        await rate_limiter.acquire(route.path, cls, HEDGE_RESERVE)
+        stats.requests += 1
+        stats.hedges += 1
+        hedge = asyncio.ensure_future(_send(session, route, stats, **kwargs))
+        tasks.add(hedge)
+        done, tasks = await asyncio.wait(tasks,
+                                         return_when=asyncio.FIRST_COMPLETED)
+        first = primary if primary in done else hedge
+        if first.exception() is not None and tasks:
+            # the other one may still get through
+            done, tasks = await asyncio.wait(tasks)
+            first = done.pop()
+        if first is hedge:
+            stats.hedges_won += 1
+        return first.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def limiter(name):
+    """Return the `AdaptiveLimiter` for the bulk job `name`, e.g. crawling
+    all players. It runs as many requests at once as the API copes with,
+    backing off on 429 and 503 responses and slow requests.
+    """
+    adaptive = limiters.get(name, None)
+    if adaptive is None:
+        adaptive = AdaptiveLimiter(
+            name, initial=4, max_limit=scheduler.max_background,
+            overload_count=lambda: metrics.count_status(429, 503),
+            overload_errors=(HTTPServiceUnavailable, DeadlineExceeded))
+        limiters[name] = adaptive
+    return adaptive
+
+
+def use_disk_cache(path, max_entries=10000):
+    """Persist cached responses in the folder `path`, so they survive
+    restarts. Responses are revalidated with the API when they expire if
+    the API sent an `ETag` or `Last-Modified` header. Responses of bulk
+    jobs (background requests that aren't refreshes) are only stored if
+    they replace a stored one.
+    
+    Does blocking I/O to clean up old entries, call it on startup.
+    """
+    global disk_cache
+    disk_cache = DiskCache(path, CACHE_TTLS, max_entries, MAX_STALE)
+    disk_cache.prune()
+    return disk_cache
+
+
+def invalidate(path, **parameters):
+    """Drop cached responses of the endpoint `path`. If URL parameters are
+    given, only the response for that URL is dropped, e.g.
+    `invalidate("/Teams/{team_id}", team_id=team.id)`.
+
+    Returns the number of dropped responses.
+    """
+    url = Route("GET", path, **parameters).url if parameters else None
+    return cache.invalidate(path, url)
+
+
+async def _request(route, **kwargs):
+    """Send the request, retrying if rate limited or on server errors.
+
+    Returns the decoded JSON and the response headers. If a conditional
+    request comes back with 304, `_NOT_MODIFIED` is returned instead of
+    data.
+    """
     method = route.method
     url = route.url
 
-    async with aiohttp.ClientSession() as session:
-        for tries in range(10):
-            async with session.request(method, url, **kwargs) as r:
-                log.debug(f"{method} {url} with {kwargs.get('params', {})} has returned {r.status}")
+    session = await start()
+    stats = metrics.endpoint(route.path)
+    failures = 0
+    allowed = False     # whether the request may be the circuit's probe
+    try:
+        for tries in range(MAX_TRIES):
+            allowed = breaker.allow(route.path)
+            if not allowed:
+                raise HTTPCircuitOpen(route, breaker.retry_at(route.path))
+            queued = time.perf_counter()
+            slot = await within(scheduler.acquire())
+            held_back(time.perf_counter() - queued)
+            try:
+                if slot.cls == BACKGROUND:
+                    reserve = BACKGROUND_RESERVE
+                elif scheduler.busy(slot.guild):
+                    reserve = BUSY_GUILD_RESERVE
+                else:
+                    reserve = 0
+                waited = await within(rate_limiter.acquire(
+                    route.path, slot.cls, reserve))
+                stats.rate_limit_wait += waited
+                held_back(waited)
+                budget = remaining()
+                if budget is not None and budget <= 0:
+                    raise DeadlineExceeded()
+                timeout = aiohttp.ClientTimeout(
+                    total=REQUEST_TIMEOUT if budget is None
+                          else min(REQUEST_TIMEOUT, budget))
+                stats.requests += 1
+                if tries:
+                    stats.retries += 1
+                r, body = await _attempt(route, session, stats, slot.cls,
+                                         timeout=timeout, **kwargs)
+                stats.statuses[r.status] += 1
+                log.debug("%s %s with %s has returned %s", method, url,
+                          kwargs.get('params', {}), r.status)
+                rate_limiter.update(route.path, r.headers)
                 # request successfull, return json data
                 if r.status == 200:
-                    data = json.loads(await r.text(encoding="utf-8"))
-                    log.debug(f"{method} {url} has recieved {data}")
-                    return data
+                    stats.bytes_received += len(body)
+                    try:
+                        data = _loads(body)
+                    except ValueError as e:
+                        # e.g. an HTML maintenance page, the API isn't
+                        # working
+                        stats.errors += 1
+                        breaker.failure(route.path)
+                        raise HTTPUnavailable(f"{method} {url} came back "
+                                              f"with invalid JSON: {e}",
+                                              route, r) from e
+                    log.debug("%s %s has recieved %d bytes", method,
+                              url, len(body))
+                    breaker.success(route.path)
+                    return data, r.headers
                 
-                # rate limited, wait and try again if tries left
+                if r.status == 304:
+                    breaker.success(route.path)
+                    return _NOT_MODIFIED, r.headers
+                
+                # rate limited, hold back all requests of this bucket and
+                # try again if tries left
                 if r.status == 429:
-                    wait_time = float(r.headers['X-RateLimit-Reset-After'])
+                    breaker.success(route.path)
+                    wait_time = rate_limiter.block(route.path, r.headers)
                     log.warning(f"We're being rate limited. Retry in {wait_time:.3f} seconds.")
                     
-                    if r.headers['X-RateLimit-Global'] == 'True':
-                        log.warning("Rate limit is global. %s", r.headers['X-RateLimit-Global'])
-                    
-                    await asyncio.sleep(wait_time)
-                    log.debug("Done waiting for rate limit. Retrying...")
+                    if r.headers.get('X-RateLimit-Global', None) == 'True':
+                        log.warning("Rate limit is global.")
                     
                     continue
 
-                if r.status == 503:
-                    # service unavailable
-                    raise HTTPServiceUnavailable(route, r)
+                if r.status < 500:
+                    # our fault, trying again won't help
+                    breaker.success(route.path)
+                    raise HTTPException(
+                        f"{method} {url} came back with status "
+                        f"{r.status} {r.reason}.", route, r)
                 
-                log.warning(f"Request came back with status {r.status} {r.reason}. Trying again")
-
-        # ran out of retries
-        raise HTTPException(f"{route.method} {route.url} with querry params {kwargs} ran out of retries.")
-
+                breaker.failure(route.path)
+                log.warning(f"Request came back with status {r.status} {r.reason}.")
+                if r.status == 503 and failures >= RETRIES:
+                    # service unavailable, not just for a moment
+                    raise HTTPServiceUnavailable(route, r)
+            except DeadlineExceeded:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                budget = remaining()
+                if budget is not None and budget <= 0:
+                    # ran out of time, not the API's fault
+                    raise DeadlineExceeded() from e
+                if (isinstance(e, asyncio.TimeoutError)
+                        and timeout.total < REQUEST_TIMEOUT):
+                    # cut short by a deadline that was extended since
+                    log.debug(f"{method} {url} timed out early, deadline "
+                              "was extended. Trying again.")
+                    continue
+                stats.errors += 1
+                breaker.failure(route.path)
+                log.warning(f"{method} {url} failed with "
+                            f"{e.__class__.__name__}: {e}")
+                if failures >= RETRIES:
+                    raise HTTPUnavailable(f"{method} {url} failed: {e}",
+                                          route) from e
+            finally:
+                scheduler.release(slot)
+            
+            if failures >= RETRIES:
+                break
+            delay = backoff_delay(failures, BACKOFF_BASE, BACKOFF_MAX)
+            budget = remaining()
+            if budget is not None and budget <= delay:
+                raise DeadlineExceeded()
+            failures += 1
+            log.warning(f"Trying again in {delay:.3f} seconds.")
+            await asyncio.sleep(delay)
+    except BaseException:
+        # whatever went wrong, a probe without result mustn't keep the
+        # circuit waiting for it
+        if allowed:
+            breaker.abort(route.path)
+        raise
+
+    # ran out of retries
+    raise HTTPUnavailable(f"{route.method} {route.url} with querry params {kwargs} ran out of retries.", route)
+
+
+
+async def _search(route, query):
+    """Send a search request, unless the result can be taken from the
+    result of a broader search, see `search_cache`.
+
+    The API gets the name as given, it's only normalized to look up and
+    narrow down results locally."""
+    scope = _request_key(route, {k: v for k, v in query.items()
+                                 if k != "name"})
+    name = normalize_query(query["name"])
+    data = search_cache.get(scope, name)
+    if data is not None:
+        log.debug("Search cache hit for %s %s", route.url, query)
+        return _copy(data)
+    data = await request(route, params=query)
+    if not data:
+        return data
+    search_cache.set(scope, name, _copy(data))
+
+    # searches that came back empty but would find some of these now
+    names = [search_cache.name_of(e) for e in data]
+    def found(key):
+        params = dict(key[2])
+        other = tuple(p for p in key[2] if p[0] != "name")
+        return ((key[0], key[1], other) == scope
+                and any(normalize_query(params.get("name", "")) in n
+                        for n in names))
+    negative_cache.invalidate(route.path, found)
+    return data
 
 
 async def player_search(name):
@@ -84,8 +717,8 @@ async def player_search(name):
     Query
         name: Player name to search for
     """
-    params = {"name": name}
-    return await request(Route("GET", "/Players/Search"), params=params)
+    r = Route("GET", "/Players/Search")
+    return await _search(r, {"name": name.strip()})
 
 
 async def get_game(game):
@@ -129,7 +762,7 @@ async def search_team(game, name, season=None, region=None):
         region: Region the team plays in (`NA`, `EU`, `OCE`, or `none`).
     """
     r = Route("GET", "/{game}/Teams/Search", game=game)
-    query = {"name": name}
+    query = {"name": name.strip()}
     if season:
         if isinstance(season, Season):
             query["season"] = season.id
@@ -137,7 +770,7 @@ async def search_team(game, name, season=None, region=None):
             query["season"] = season
     if region:
         query["region"] = region
-    return await request(r, params=query)
+    return await _search(r, query)
 
 
 async def get_match_sets(match_id):
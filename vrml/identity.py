@@ -0,0 +1,123 @@
+from collections import OrderedDict
+import logging
+
+__all__ = (
+    "IdentityMap",
+    "seasons",
+    "partial_teams",
+    "partial_games",
+)
+
+log = logging.getLogger(__name__)
+
+
+class IdentityMap:
+    """Keeps one shared instance per entity ID, so e.g. the same season in
+    every bio of a player is decoded once.
+
+    Instances are decoded from the `state_keys` of the payloads only, so
+    they don't keep the rest of a payload alive. `aliases` maps keys some
+    endpoints use to the ones others use for the same value, e.g. `"id"`
+    to `"teamID"`.
+
+    The ID of a payload is the first of its `id_keys` that's set, payloads
+    without ID aren't shared. What's known of an ID is merged from all its
+    payloads: if a payload has a `state_keys` value that isn't known yet
+    or differs, a new instance is decoded from the merged state and shared
+    from then on. Keys a payload lacks or has set to `None` keep their
+    known value. Instances handed out earlier don't change, whatever the
+    payload (it may be outdated data from a cache). At most `max_size`
+    instances are kept, least recently used ones are dropped.
+
+    Shared instances must not be modified by their users.
+    """
+    def __init__(self, name, id_keys, state_keys, max_size=1000,
+                 aliases=None) -> None:
+        self.name = name
+        self.id_keys = id_keys
+        self.state_keys = state_keys
+        self.max_size = max_size
+        self.aliases = aliases or {}
+        # (key in payloads, key in the known state)
+        self._keys = tuple((k, self.aliases.get(k, k)) for k in state_keys)
+        self._entries = OrderedDict()   # id -> [instance, known state]
+        self.hits = 0
+        self.updates = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _state(self, data):
+        "The `state_keys` values of `data` that are set, under their aliases."
+        state = {}
+        for key, known_key in self._keys:
+            value = data.get(key, None)
+            if value is not None:
+                state[known_key] = value
+        return state
+
+    def resolve(self, cls, data):
+        """Return the shared `cls` instance for the payload `data`. A map is
+        meant for one class."""
+        for key in self.id_keys:
+            id = data.get(key, None)
+            if id is not None:
+                break
+        else:
+            return cls(self._state(data))
+        entry = self._entries.get(id, None)
+        if entry is None:
+            self.misses += 1
+            state = self._state(data)
+            obj = cls(state)
+            self._entries[id] = [obj, state]
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return obj
+        self._entries.move_to_end(id)
+        obj, known = entry
+        for key, known_key in self._keys:
+            value = data.get(key, None)
+            if value is not None and value != known.get(known_key, None):
+                break
+        else:
+            # nothing new
+            self.hits += 1
+            return obj
+        self.updates += 1
+        log.debug("Replacing shared %s %s.", cls.__name__, id)
+        # earlier instances may hold on to the known state
+        known = {**known, **self._state(data)}
+        obj = cls(known)
+        entry[0] = obj
+        entry[1] = known
+        return obj
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "updates": self.updates,
+            "misses": self.misses,
+        }
+
+
+seasons = IdentityMap(
+    "seasons", ("seasonID",),
+    ("seasonID", "seasonName", "isCurrent", "championshipUrl",
+     "dateStartUTC", "dateEndUTC", "dateChampionshipStartUTC"),
+    max_size=500)
+partial_teams = IdentityMap(
+    "teams", ("teamID", "id"),
+    ("teamID", "teamName", "teamLogo", "id", "name", "image"),
+    max_size=5000,
+    aliases={"id": "teamID", "name": "teamName", "image": "teamLogo"})
+partial_games = IdentityMap(
+    "games", ("gameID",),
+    ("gameID", "gameName", "teamMode", "matchMode", "url",
+     "hasSubstitutes", "hasTies", "hasCasters", "hasCameraman"),
+    max_size=50)
@@ -1,6 +1,6 @@
-from datetime import datetime
 import asyncio
-from . import BASE_URL, short_game_names
+from .utils import BASE_URL, short_game_names, lazy
+from .schema import Field, decoder, lazy_date, absolute_url
 from .team import PartialTeam
 from .set import Set
 from . import http
@@ -11,37 +11,34 @@ __all__ = (
 
 
 class CastingInfo:
-    def __init__(self, data) -> None:
-        self.channel_type = data.get("channelType", None)
-        self.channel_id = data.get("channelID", None)
-        self.channel_url = data.get("channelURL", None)
-        
-        self.caster_id = data.get("casterID", None)
-        self.caster = data.get("caster", None)
-        self._rel_caster_logo = data.get("casterLogo", None)
-        self.caster_logo = None
-        if self._rel_caster_logo is not None:
-            self.caster_logo = BASE_URL + self._rel_caster_logo
-            
-        self.co_caster_id = data.get("coCasterID", None)
-        self.co_caster = data.get("coCaster", None)
-        self._rel_co_caster_logo = data.get("coCasterLogo", None)
-        self.co_caster_logo = None
-        if self._rel_co_caster_logo is not None:
-            self.co_caster_logo = BASE_URL + self._rel_co_caster_logo
-
-        self.cameraman_id = data.get("cameramanID", None)
-        self.cameraman = data.get("cameraman", None)
-        self.cameraman_logo = data.get("cameramanLogo", None)
-        if self.cameraman_logo is not None:
-            self.cameraman_logo = BASE_URL + self.cameraman_logo
-
-        self.post_game_interview_id = data.get("postGameInterviewID", None)
-        self.post_game_interview = data.get("postGameInterview", None)
-        self.post_game_interview_logo = data.get("postGameInterviewLogo", None)
-        self.post_game_interview_logo = None
-        if self.post_game_interview_logo is not None:
-            self.post_game_interview_logo = BASE_URL + self.post_game_interview_logo
+    __slots__ = (
+        "channel_type", "channel_id", "channel_url", "caster_id", "caster",
+        "_rel_caster_logo", "caster_logo", "co_caster_id", "co_caster",
+        "_rel_co_caster_logo", "co_caster_logo", "cameraman_id", "cameraman",
+        "cameraman_logo", "post_game_interview_id", "post_game_interview",
+        "post_game_interview_logo"
+    )
+
+    __init__ = decoder(
+        Field("channel_type", "channelType"),
+        Field("channel_id", "channelID"),
+        Field("channel_url", "channelURL"),
+        Field("caster_id", "casterID"),
+        Field("caster", "caster"),
+        Field("_rel_caster_logo", "casterLogo"),
+        Field("caster_logo", "casterLogo", absolute_url),
+        Field("co_caster_id", "coCasterID"),
+        Field("co_caster", "coCaster"),
+        Field("_rel_co_caster_logo", "coCasterLogo"),
+        Field("co_caster_logo", "coCasterLogo", absolute_url),
+        Field("cameraman_id", "cameramanID"),
+        Field("cameraman", "cameraman"),
+        Field("cameraman_logo", "cameramanLogo", absolute_url),
+        Field("post_game_interview_id", "postGameInterviewID"),
+        Field("post_game_interview", "postGameInterview"),
+        Field("post_game_interview_logo", "postGameInterviewLogo",
+              absolute_url),
+    )
         
     async def _fetch_caster(self, id): # move to Game / PartialGame
         raise NotImplementedError
@@ -58,45 +55,66 @@ class CastingInfo:
         
 
 class Match:
-    def __init__(self, data) -> None:
-        self.season = data.get("seasonName", None)
-        self.winning_team_id = data.get("winningTeamID", None)
-        self.losing_team_id = data.get("losingTeamID", None)
-        self.home_score = data.get("homeScore", None)
-        self.away_score = data.get("awayScore", None)
-        self.is_tie = data.get("isTie", None)
-        self.is_forfeit = data.get("isForfeit", None)
-        self.id = data.get("matchID", None)
-        self.week = data.get("week", None)
-        self.is_scheduled = data.get("isScheduled", None)
-        self.is_specific_division = data.get("isSpecificDivision", None)
-        self.is_challenge = data.get("isChallenge", None)
-        self.is_cup = data.get("isCup", None)
-        self.date_scheduled = data.get("dateScheduledUTC", None)
-        if self.date_scheduled is not None or self.date_scheduled != "TBD":
-            aware_date = self.date_scheduled + "+00:00"
-            self.date_scheduled = datetime.fromisoformat(aware_date)
-        self.date_scheduled_user = data.get("dateScheduledUser", None)
-        self.date_scheduled_user_tz = data.get("dateScheduledUserTimezone", None)
-        self.vod_url = data.get("vodUrl", None)
-        self.home_highlights = data.get("homeHighlights", None)
-        self.away_highlights = data.get("awayHighlights", None)
-        self.postpone_team_id = data.get("postponeTeamID", None)
-        self.mods_review = data.get("modsReview", None)
-        self.mods_review_note = data.get("modsReviewNote", None)
-
-        self.casting_info = CastingInfo(data.get("castingInfo", {}))
+    __slots__ = (
+        "season", "winning_team_id", "losing_team_id", "home_score",
+        "away_score", "is_tie", "is_forfeit", "id", "week", "is_scheduled",
+        "is_specific_division", "is_challenge", "is_cup", "_date_scheduled",
+        "date_scheduled_user", "date_scheduled_user_tz", "vod_url",
+        "home_highlights", "away_highlights", "postpone_team_id",
+        "mods_review", "mods_review_note", "_casting_info",
+        "home_team_submitted_scores", "away_team_submitted_scores",
+        "_home_team", "_away_team", "sets", "game_name", "_data"
+    )
+
+    _decode = decoder(
+        Field("season", "seasonName"),
+        Field("winning_team_id", "winningTeamID"),
+        Field("losing_team_id", "losingTeamID"),
+        Field("home_score", "homeScore"),
+        Field("away_score", "awayScore"),
+        Field("is_tie", "isTie"),
+        Field("is_forfeit", "isForfeit"),
+        Field("id", "matchID"),
+        Field("week", "week"),
+        Field("is_scheduled", "isScheduled"),
+        Field("is_specific_division", "isSpecificDivision"),
+        Field("is_challenge", "isChallenge"),
+        Field("is_cup", "isCup"),
+        Field("date_scheduled_user", "dateScheduledUser"),
+        Field("date_scheduled_user_tz", "dateScheduledUserTimezone"),
+        Field("vod_url", "vodUrl"),
+        Field("home_highlights", "homeHighlights"),
+        Field("away_highlights", "awayHighlights"),
+        Field("postpone_team_id", "postponeTeamID"),
+        Field("mods_review", "modsReview"),
+        Field("mods_review_note", "modsReviewNote"),
+    )
 
+    def __init__(self, data) -> None:
+        self._data = data
+        self._decode(data)
         home_team_data = data.get("homeTeam", {})
         away_team_data = data.get("awayTeam", {})
-        self.home_team_submitted_scores = home_team_data.pop("submittedScores", None)
-        self.away_team_submitted_scores = away_team_data.pop("submittedScores", None)
-        self.home_team = PartialTeam(home_team_data)
-        self.away_team = PartialTeam(away_team_data)
+        self.home_team_submitted_scores = home_team_data.get("submittedScores", None)
+        self.away_team_submitted_scores = away_team_data.get("submittedScores", None)
 
         self.sets = None
         self.game_name = None
 
+    date_scheduled = lazy_date("dateScheduledUTC")
+
+    @lazy
+    def casting_info(self):
+        return CastingInfo(self._data.get("castingInfo", {}))
+
+    @lazy
+    def home_team(self):
+        return PartialTeam.from_data(self._data.get("homeTeam", {}))
+
+    @lazy
+    def away_team(self):
+        return PartialTeam.from_data(self._data.get("awayTeam", {}))
+
     @property
     def scores_submitted(self):
         return self.home_team_submitted_scores and \
@@ -112,42 +130,3 @@ class Match:
         data = await http.get_match_sets(self.id)
         self.sets = [Set(d) for d in data]
         return self.sets
-    
-    def ordered_str(self, team_id, match_link=False, vod_link=True):
-        "String representation, but ordered to put the specified team first"
-        line = []
-        if self.is_scheduled:
-            line.append(f"<t:{int(self.date_scheduled.timestamp())}:d>")
-        else:
-            line.append(f"TBD")
-        
-        if self.scores_submitted:
-            if team_id == self.home_team.id:
-                line.append(self.home_team.name)
-                line.append(f"{self.home_score}-{self.away_score}")
-                line.append(self.away_team.name)
-            elif team_id == self.away_team.id:
-                line.append(self.away_team.name)
-                line.append(f"{self.away_score}-{self.home_score}")
-                line.append(self.home_team.name)
-            else:
-                line.append("*error*")
-        else:
-            if team_id == self.home_team.id:
-                line.append(f"{self.home_team.name} - {self.away_team.name}")
-            elif team_id == self.away_team.id:
-                line.append(f"{self.away_team.name} - {self.home_team.name}")
-            else:
-                line.append("*error*")
-        
-        links = ""
-        if match_link:
-            links += f'[[match]]({self.url} "Match page")'
-        if vod_link and self.vod_url:
-            links += f' [[VOD]]({self.vod_url} "Match VOD")'
-        line.append(links)
-        
-        return " ".join(line)
-
-
-
@@ -0,0 +1,113 @@
+from collections import Counter, deque
+import math
+
+__all__ = (
+    "Latencies",
+    "EndpointStats",
+    "Metrics",
+)
+
+
+class Latencies:
+    """Latency samples of the last `size` requests, to compute percentiles.
+    Count and sum are kept for all samples."""
+    def __init__(self, size=1000) -> None:
+        self._samples = deque(maxlen=size)
+        self._sorted = None
+        self.count = 0
+        self.total = 0.0
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+        self._sorted = None
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, p):
+        "Return the `p`-th percentile (0-100) in seconds or `None`."
+        if not self._samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        i = math.ceil(p / 100 * len(self._sorted)) - 1
+        return self._sorted[max(0, min(i, len(self._sorted) - 1))]
+
+
+class EndpointStats:
+    "Counters for one endpoint, e.g. `/Teams/{team_id}`."
+    def __init__(self, path) -> None:
+        self.path = path
+        self.requests = 0           # requests sent, including retries
+        self.retries = 0
+        self.errors = 0             # connection errors and timeouts
+        self.statuses = Counter()
+        self.latencies = Latencies()
+        self.bytes_received = 0
+        self.rate_limit_wait = 0.0  # seconds held back by the rate limiter
+        self.hedges = 0             # second requests sent for slow ones
+        self.hedges_won = 0         # ... that answered first
+
+    def summary(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "p50": self.latencies.percentile(50),
+            "p95": self.latencies.percentile(95),
+            "p99": self.latencies.percentile(99),
+            "bytes_received": self.bytes_received,
+            "rate_limit_wait": self.rate_limit_wait,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+        }
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+class Metrics:
+    "Request metrics per endpoint."
+    def __init__(self) -> None:
+        self.endpoints = {}
+
+    def endpoint(self, path):
+        stats = self.endpoints.get(path, None)
+        if stats is None:
+            stats = EndpointStats(path)
+            self.endpoints[path] = stats
+        return stats
+
+    def count_status(self, *statuses):
+        "Sum of responses with one of `statuses` over all endpoints."
+        return sum(s.statuses[status] for s in self.endpoints.values()
+                   for status in statuses)
+
+    def summary(self):
+        return {path: s.summary() for path, s in self.endpoints.items()}
+
+    def reset(self):
+        self.endpoints.clear()
+
+    def format(self):
+        "Return the metrics as plain text table."
+        lines = []
+        for path, s in sorted(self.endpoints.items()):
+            statuses = " ".join(f"{k}:{v}"
+                                for k, v in sorted(s.statuses.items()))
+            hedges = (f", hedged {s.hedges} (won {s.hedges_won})"
+                      if s.hedges else "")
+            lines.append(
+                f"{path}\n"
+                f"  requests {s.requests}, retries {s.retries}, "
+                f"errors {s.errors}, statuses {statuses or '-'}\n"
+                f"  latency ms p50 {_ms(s.latencies.percentile(50))}, "
+                f"p95 {_ms(s.latencies.percentile(95))}, "
+                f"p99 {_ms(s.latencies.percentile(99))}\n"
+                f"  received {s.bytes_received / 1024:.1f} KiB, "
+                f"rate limit wait {s.rate_limit_wait:.1f} s{hedges}")
+        return "\n".join(lines) or "No requests yet."
@@ -1,22 +1,26 @@
 from .user import User
-from datetime import datetime, timezone
+from .schema import Field, decoder, lazy_date
 
 class NewsPost:
+    __slots__ = (
+        "id", "user", "_date_submitted", "_date_edited", "title", "_html",
+        "_game", "_data"
+    )
+
+    _decode = decoder(
+        Field("id", "newsID"),
+        Field("title", "title"),
+        Field("_html", "html"),
+    )
+
     def __init__(self, data):
-        self.id = data.get("newsID", None)
+        self._data = data
+        self._decode(data)
         self.user = User(data)
-        self.date_submitted = data.get("dateSubmittedUTC", None)
-        self.date_edited = data.get("dateEditedUTC", None)
-        self.title = data.get("title", None)
-        self._html = data.get("html", None)
         self._game = None
 
-        if self.date_submitted:
-            aware = self.date_submitted + "+00:00"
-            self.date_submitted = datetime.fromisoformat(aware)
-        if self.date_edited:
-            aware = self.date_edited + "+00:00"
-            self.date_edited = datetime.fromisoformat(aware)
+    date_submitted = lazy_date("dateSubmittedUTC")
+    date_edited = lazy_date("dateEditedUTC")
 
     @property
     def game(self):
@@ -1,10 +1,10 @@
-from .utils import BASE_URL, dc_escape
+from .utils import lazy
+from .schema import Field, decoder, lazy_date, absolute_url
 from .user import User
 from .game import PartialGame
 from .bio import Bio
 from . import http
-from datetime import datetime, timedelta
-from discord import Embed
+from .cache import fingerprint
 
 __all__ = (
     "PartialPlayer",
@@ -14,20 +14,14 @@ __all__ = (
 
 
 class PartialPlayer:    # like from `/Players/Search`
-    def __init__(self, data) -> None:
-        self.id = data.get("playerID", None)
-        self.name = data.get("playerName", None)
-        self.logo_url = data.get("playerLogo", None)
-        
-        if self.id == None:
-            self.id = data.get("id", None)
-        if self.name == None:
-            self.name = data.get("name", None)
-        if self.logo_url == None:
-            self.logo_url = data.get("image", None)
-        
-        if self.logo_url is not None:
-            self.logo_url = BASE_URL + self.logo_url
+    __slots__ = ("id", "name", "logo_url")
+
+    # `/Players/Search` has other keys than the rest
+    __init__ = decoder(
+        Field("id", ("playerID", "id")),
+        Field("name", ("playerName", "name")),
+        Field("logo_url", ("playerLogo", "image"), absolute_url),
+    )
     
     async def fetch(self):
         data = await http.get_player_detailed(self.id)
@@ -35,89 +29,90 @@ class PartialPlayer:    # like from `/Players/Search`
 
 
 class Player:       # like from `/Players/player_id/Detailed`
+    __slots__ = (
+        "cached_at", "user", "id", "name", "logo_url", "game", "url",
+        "_bio_current", "_bio_history", "_team", "_version", "_data"
+    )
+
+    _decode = decoder(
+        Field("id", "playerID"),
+        Field("name", "playerName"),
+        Field("logo_url", "userLogo", absolute_url),
+    )
+
     def __init__(self, data) -> None:
-        user_data = data.pop("user", {})
-        player_data = data.pop("thisGame", {})
-        # connoisseur_data = data     # remaining data is connoisseur related. This is not used yet
-
-        self.user = User(user_data)
-        self.id = player_data.get("playerID", None)
-        self.name = player_data.get("playerName", None)
-        self.logo_url = player_data.get("userLogo", None)
-        if self.logo_url is not None:
-            self.logo_url = BASE_URL + self.logo_url
-        self.game = PartialGame(player_data.get("game", {}))
+        self.cached_at = http.cached_at(data)
+        # the remaining data is connoisseur related. This is not used yet
+        player_data = data.get("thisGame", {})
+        self._data = player_data
+        self._decode(player_data)
+        self.user = User(data.get("user", {}))
+        self.game = PartialGame.from_data(player_data.get("game", {}))
 
         self.url = f"{self.game.url}/Players/{self.id}"
 
-        self.bio_current = Bio(player_data.get("bioCurrent", {}))
-        bio_history = player_data.get("bioHistory", [])
-        try:
-            self.bio_history = [Bio(d) for d in bio_history[1:]]
-        except IndexError:
-            self.bio_history = []
-        
-        self.team = None
-        if self.bio_current.team_id is not None:
-            from .team import PartialTeam
-            self.team = PartialTeam(player_data.get("bioCurrent",{}))
-        
-    def get_embed(self):
-        e = Embed(title=dc_escape(self.name),
-                  url=self.url)
-        d = (f"Team: {self.team.name if self.team else '*not on a team*'}\n"
-             f"Discord handle: `{self.user.discord_tag or 'Unlinked'}`\n"
-             f"Plays from: {self.user.country or 'Not specified'}\n"
-             f"Nationality: {self.user.nationality or 'Not specified'}\n")
-        if self.user.stream_url:
-            d += f"[Stream]({self.user.stream_url})\n" 
-        if self.bio_current.honours_mention:
-            d += f"**{self.bio_current.honours_mention}**"
-        e.description = d
-        e.set_thumbnail(url=self.logo_url)
-        e.set_footer(text=f"Game: {self.game.name}\nJoined VRML on")
-        e.timestamp = self.user.date_joined
-
-        s = "\n".join(
-            f"{b.season.name} | {b.team_name} | {b.division} | MMR: {b.mmr}"
-            for b in self.bio_history
-        )
-        e.add_field(name="Teams history",
-                    value=s or "No prior teams")
-        
-        return e
+    # sub-objects are decoded when first used, e.g. the crawl only needs
+    # the team
+    @lazy
+    def bio_current(self):
+        return Bio(self._data.get("bioCurrent", {}))
+
+    @lazy
+    def bio_history(self):
+        bio_history = self._data.get("bioHistory", [])
+        return [Bio(d) for d in bio_history[1:]]
+
+    @lazy
+    def team(self):
+        bio_data = self._data.get("bioCurrent", {})
+        if bio_data.get("teamID", None) is None:
+            return None
+        from .team import PartialTeam
+        return PartialTeam.from_data(bio_data)
+
+    @lazy
+    def version(self):
+        "Changes when the player's data does, e.g. to key rendered views."
+        return fingerprint((self._data, self.user._data))
 
 
 class TeamPlayer:       # like from `/Team/team_id`
-    def __init__(self, data) -> None:
-        self.is_cooldown = data.get("isCooldown", None)
-        self.cooldown_note = data.get("cooldownNote", None)
-        self.cooldown_date_expires = data.get("cooldownDateExpiresUTC", None)
-        self.honours_mention_note = data.get("honoursMentionNote", None)
-        self.honours_mention_logo = data.get("honoursMentionLogo", None)
-        self._discord_team_role_id = data.pop("discordTeamRole", None)
-
-        self.id = data.get("playerID", None)
-        self.name = data.get("playerName", None)
-        self.user_id = data.get("userID", None)
-        self.logo_url = data.get("userLogo", None)
-        if self.logo_url is not None:
-            self.logo_url = BASE_URL+self.logo_url
-        self.country = data.get("country", None)
-        self.nationality = data.get("nationality", None)
-        self.stream_url = data.get("streamURL", None)
-        self.team_id = data.get("teamID", None)
-        self.team_name = data.get("teamName", None)
-        self._role_id = data.get("roleID", None)
-        self.role = data.get("role", None)
-        self.is_team_owner = data.get("isTeamOwner", None)
-        self.is_team_starter = data.get("isTeamStarter", None)
-
-        if self.cooldown_date_expires is not None:
-            aware_date = self.cooldown_date_expires+"+00:00"
-            self.cooldown_date_expires = datetime.fromisoformat(aware_date)
+    __slots__ = (
+        "is_cooldown", "cooldown_note", "_cooldown_date_expires",
+        "honours_mention_note", "honours_mention_logo",
+        "_discord_team_role_id", "id", "name", "user_id", "logo_url",
+        "country", "nationality", "stream_url", "team_id", "team_name",
+        "_role_id", "role", "is_team_owner", "is_team_starter", "_team",
+        "_data"
+    )
+
+    _decode = decoder(
+        Field("is_cooldown", "isCooldown"),
+        Field("cooldown_note", "cooldownNote"),
+        Field("honours_mention_note", "honoursMentionNote"),
+        Field("honours_mention_logo", "honoursMentionLogo"),
+        Field("_discord_team_role_id", "discordTeamRole"),
+        Field("id", "playerID"),
+        Field("name", "playerName"),
+        Field("user_id", "userID"),
+        Field("logo_url", "userLogo", absolute_url),
+        Field("country", "country"),
+        Field("nationality", "nationality"),
+        Field("stream_url", "streamURL"),
+        Field("team_id", "teamID"),
+        Field("team_name", "teamName"),
+        Field("_role_id", "roleID"),
+        Field("role", "role"),
+        Field("is_team_owner", "isTeamOwner"),
+        Field("is_team_starter", "isTeamStarter"),
+    )
 
+    def __init__(self, data) -> None:
+        self._data = data
+        self._decode(data)
         self._team = None
+
+    cooldown_date_expires = lazy_date("cooldownDateExpiresUTC")
     
     @property
     def team(self):
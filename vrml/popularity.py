@@ -0,0 +1,105 @@
+from collections import OrderedDict
+import time
+
+__all__ = (
+    "Popularity",
+)
+
+
+class _Record:
+    __slots__ = ("score", "updated", "request")
+
+    def __init__(self, score, updated, request) -> None:
+        self.score = score
+        self.updated = updated
+        self.request = request
+
+
+class Popularity:
+    """Tracks how often cache keys are requested, so the most popular
+    responses can be refreshed before they expire.
+
+    Every request adds 1 to the key's score, scores halve every
+    `half_life` seconds (LFU with decay). At most `max_keys` keys are
+    tracked, least recently requested ones are dropped.
+
+    Also keeps count of the refreshes issued and the cache misses they
+    saved, i.e. hits on refreshed responses that would have expired
+    otherwise.
+    """
+    def __init__(self, half_life=30 * 60, max_keys=5000) -> None:
+        self.half_life = half_life
+        self.max_keys = max_keys
+        self._records = OrderedDict()
+        self._refreshed = {}    # key -> expiry of the replaced response
+        self.refreshes = 0
+        self.saved = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def _decayed(self, record, now):
+        return record.score * 0.5 ** ((now - record.updated)
+                                      / self.half_life)
+
+    def touch(self, key, request=None):
+        """Count a request for `key`. `request` is anything needed to send
+        it again, it's kept with the latest count."""
+        now = time.monotonic()
+        record = self._records.get(key, None)
+        if record is None:
+            record = _Record(0.0, now, request)
+            self._records[key] = record
+        record.score = self._decayed(record, now) + 1
+        record.updated = now
+        if request is not None:
+            record.request = request
+        self._records.move_to_end(key)
+        while len(self._records) > self.max_keys:
+            self._records.popitem(last=False)
+
+    def score(self, key):
+        record = self._records.get(key, None)
+        if record is None:
+            return 0.0
+        return self._decayed(record, time.monotonic())
+
+    def hottest(self, keys, min_score=1.0, n=None):
+        """Return `(key, request)` of the `n` most popular of `keys` with a
+        score of at least `min_score`, most popular first."""
+        now = time.monotonic()
+        scored = []
+        for key in keys:
+            record = self._records.get(key, None)
+            if record is None:
+                continue
+            score = self._decayed(record, now)
+            if score >= min_score:
+                scored.append((score, key, record.request))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [(key, request) for _, key, request in scored[:n]]
+
+    def refreshed(self, key, expires):
+        """Count a refresh of `key` whose cached response expires at
+        `expires` (`time.monotonic` time)."""
+        self.refreshes += 1
+        self._refreshed[key] = expires
+
+    def hit(self, key):
+        "Count a cache hit on `key`."
+        expires = self._refreshed.get(key, None)
+        if expires is not None and expires <= time.monotonic():
+            # would have been a miss without the refresh
+            del self._refreshed[key]
+            self.saved += 1
+
+    def miss(self, key):
+        "Count a cache miss on `key`."
+        self._refreshed.pop(key, None)
+
+    def stats(self):
+        return {
+            "tracked": len(self._records),
+            "refreshes": self.refreshes,
+            "saved": self.saved,
+        }
@@ -0,0 +1,240 @@
+import asyncio
+import heapq
+import itertools
+import logging
+
+__all__ = (
+    "Bucket",
+    "RateLimiter",
+)
+
+log = logging.getLogger(__name__)
+
+
+def _header(headers, name, type):
+    value = headers.get(name, None)
+    if value is None:
+        return None
+    try:
+        return type(value)
+    except ValueError:
+        return None
+
+
+class _PriorityLock:
+    """Lock handing over to the waiter with the highest priority (lowest
+    number) first, in order of arrival within the same priority."""
+    def __init__(self) -> None:
+        self._locked = False
+        self._waiters = []
+        self._count = itertools.count()
+
+    async def acquire(self, priority=0):
+        if not self._locked and not self._waiters:
+            self._locked = True
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._count), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # lock was handed over already
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._locked = False
+
+
+class Bucket:
+    """Token bucket mirroring one rate limit bucket of the API.
+
+    Quota and reset window are learned from the `X-RateLimit-*` headers of
+    the responses. If `probe` is set, only a single request is let
+    through until the first response came back. If the API doesn't send
+    any rate limit headers, the bucket doesn't limit at all.
+
+    Waiting requests are let through by priority, lower numbers first.
+    """
+    # max. time to wait for a response updating the bucket
+    UPDATE_TIMEOUT = 1.0
+
+    def __init__(self, name, probe=True) -> None:
+        self.name = name
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None    # in event loop time
+        self._seen = not probe
+        self._probing = False
+        self._lock = _PriorityLock()
+        self._updated = asyncio.Event()
+
+    def _refill(self, now):
+        if self.reset_at is not None and now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = None
+
+    async def _wait_for_update(self):
+        try:
+            await asyncio.wait_for(self._updated.wait(), self.UPDATE_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _try_take(self, reserve):
+        """Take a token if possible. Otherwise return the time to wait in
+        seconds, or `None` if a response updating the bucket is needed."""
+        now = asyncio.get_running_loop().time()
+        self._refill(now)
+        if not self._seen:
+            if self._probing:
+                return None
+            # first request, find out about the limit
+            self._probing = True
+            return 0
+        if self.limit is not None:
+            # a small bucket still lets every request through eventually
+            reserve = min(reserve, max(0, self.limit - 1))
+        if self.remaining is None or self.remaining > reserve:
+            if self.remaining:
+                self.remaining -= 1
+            return 0
+        if self.reset_at is None:
+            # exhausted and new window not known yet
+            return None
+        return self.reset_at - now
+
+    def spare(self, reserve=0):
+        """Whether a request could be sent right away without touching the
+        last `reserve` tokens."""
+        self._refill(asyncio.get_running_loop().time())
+        if not self._seen:
+            return False
+        return self.remaining is None or self.remaining > reserve
+
+    async def acquire(self, priority=0, reserve=0):
+        """Wait until a request may be sent and take a token for it.
+        The last `reserve` tokens of a window are not taken, leaving them
+        for more important requests. At least one token is always left to
+        take, even if the bucket isn't larger than `reserve`.
+
+        Returns the time waited in seconds.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        while True:
+            await self._lock.acquire(priority)
+            try:
+                delay = self._try_take(reserve)
+            finally:
+                self._lock.release()
+            if delay == 0:
+                break
+            # wait without holding the lock, so more important requests can
+            # still take the tokens we leave
+            if delay is not None:
+                log.debug("Bucket %s is exhausted. Holding request back "
+                          "for %.3f seconds.", self.name, delay)
+                await asyncio.sleep(delay)
+            elif not await self._wait_for_update():
+                if not self._seen:
+                    # probe didn't come back, let the next one try
+                    self._probing = False
+                    continue
+                # no response telling us about the window, don't wait forever
+                break
+        return loop.time() - start
+
+    def update(self, limit=None, remaining=None, reset_after=None):
+        "Update the bucket with information from a response."
+        now = asyncio.get_running_loop().time()
+        self._seen = True
+        self._updated.set()
+        self._updated.clear()
+        if limit is not None:
+            self.limit = limit
+        if reset_after is None:
+            return
+        if self.remaining is None or remaining is None:
+            self.remaining = remaining
+        else:
+            # requests sent since the response was created aren't counted
+            # by the API yet and responses can arrive out of order, so
+            # only the lowest count is trustworthy
+            self.remaining = min(self.remaining, remaining)
+        self.reset_at = now + reset_after
+
+    def exhaust(self, reset_after):
+        "Mark the bucket as empty until `reset_after` seconds from now."
+        now = asyncio.get_running_loop().time()
+        self._seen = True
+        self._updated.set()
+        self._updated.clear()
+        self.remaining = 0
+        self.reset_at = now + reset_after
+
+
+class RateLimiter:
+    """Client side rate limiter shared by all requests.
+
+    Keeps one `Bucket` per key (usually the route's path) and a separate
+    global bucket, used when the API flags a limit with
+    `X-RateLimit-Global`.
+    """
+    def __init__(self) -> None:
+        self.buckets = {}
+        # the global limit only applies once the API reports one
+        self.global_bucket = Bucket("global", probe=False)
+
+    def get_bucket(self, key):
+        bucket = self.buckets.get(key, None)
+        if bucket is None:
+            bucket = Bucket(key)
+            self.buckets[key] = bucket
+        return bucket
+
+    def _target(self, key, headers):
+        if headers.get("X-RateLimit-Global", None) == "True":
+            return self.global_bucket
+        return self.get_bucket(key)
+
+    async def acquire(self, key, priority=0, reserve=0):
+        """Wait until a request for `key` may be sent. See `Bucket.acquire`
+        for `priority` and `reserve`.
+
+        Returns the time waited in seconds.
+        """
+        waited = await self.get_bucket(key).acquire(priority, reserve)
+        waited += await self.global_bucket.acquire(priority, reserve)
+        return waited
+
+    def spare(self, key, reserve=0):
+        """Whether there are more than `reserve` tokens left for `key`, so
+        an optional request wouldn't hold back others."""
+        return (self.get_bucket(key).spare(reserve)
+                and self.global_bucket.spare(reserve))
+
+    def update(self, key, headers):
+        "Learn the current quota from the rate limit headers of a response."
+        self._target(key, headers).update(
+            limit=_header(headers, "X-RateLimit-Limit", int),
+            remaining=_header(headers, "X-RateLimit-Remaining", int),
+            reset_after=_header(headers, "X-RateLimit-Reset-After", float))
+
+    def block(self, key, headers):
+        """Handle a 429 response. The affected bucket is emptied until it
+        resets, holding back all further requests using it.
+
+        Returns the time until the bucket resets in seconds.
+        """
+        reset_after = _header(headers, "X-RateLimit-Reset-After", float)
+        if reset_after is None:
+            reset_after = 1.0
+        self._target(key, headers).exhaust(reset_after)
+        return reset_after
@@ -0,0 +1,277 @@
+from collections import Counter, OrderedDict, deque, namedtuple
+from contextlib import contextmanager
+import contextvars
+import asyncio
+import time
+import logging
+
+__all__ = (
+    "INTERACTIVE",
+    "BACKGROUND",
+    "current_priority",
+    "priority",
+    "current_guild",
+    "guild",
+    "Slot",
+    "Scheduler",
+)
+
+log = logging.getLogger(__name__)
+
+# Priority classes of requests, lower is more important.
+INTERACTIVE = 0     # someone is waiting for the result, e.g. a slash command
+BACKGROUND = 1      # bulk work like crawling all players
+
+PRIORITY_NAMES = {
+    INTERACTIVE: "interactive",
+    BACKGROUND: "background",
+}
+
+current_priority = contextvars.ContextVar("vrml_priority",
+                                          default=INTERACTIVE)
+
+
+@contextmanager
+def priority(cls):
+    """Send all requests made within the block with priority `cls`.
+
+    Tasks created within the block inherit the priority.
+    """
+    token = current_priority.set(cls)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+# Guild (Discord server) requests are made for, `None` for the bot itself.
+# Guilds get a fair share of the request slots.
+current_guild = contextvars.ContextVar("vrml_guild", default=None)
+
+
+@contextmanager
+def guild(guild_id):
+    """Account all requests made within the block to the guild
+    `guild_id`.
+
+    Tasks created within the block inherit the guild.
+    """
+    token = current_guild.set(guild_id)
+    try:
+        yield
+    finally:
+        current_guild.reset(token)
+
+
+Slot = namedtuple("Slot", ["cls", "guild"])
+
+
+class _FairQueue:
+    """Waiters of one priority class, one queue per guild. Guilds take
+    turns (round-robin)."""
+    def __init__(self) -> None:
+        self._queues = OrderedDict()
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def append(self, guild, fut):
+        queue = self._queues.get(guild, None)
+        if queue is None:
+            queue = deque()
+            self._queues[guild] = queue
+        queue.append(fut)
+        self._len += 1
+
+    def remove(self, guild, fut):
+        queue = self._queues[guild]
+        queue.remove(fut)
+        self._len -= 1
+        if not queue:
+            del self._queues[guild]
+
+    def pop(self, can_run):
+        """Remove and return `(guild, future)` of the next guild in turn
+        for which `can_run(guild)` is true, or `None`."""
+        for guild in list(self._queues):
+            if not can_run(guild):
+                continue
+            queue = self._queues.pop(guild)
+            fut = queue.popleft()
+            self._len -= 1
+            if queue:
+                # back of the line
+                self._queues[guild] = queue
+            return guild, fut
+        return None
+
+
+class _ClassStats:
+    __slots__ = ("granted", "waited", "peak_waiting")
+
+    def __init__(self) -> None:
+        self.granted = 0
+        self.waited = 0.0
+        self.peak_waiting = 0
+
+
+class Scheduler:
+    """Limits the number of requests in flight and hands out free slots by
+    priority, and within a priority fairly between guilds.
+
+    At most `max_active` requests run at the same time, background requests
+    only up to `max_background` of them, so some connections are always
+    left for interactive requests. Freed slots go to waiting interactive
+    requests first. A single guild gets at most `max_per_guild` slots,
+    waiting guilds take turns, so one busy guild can't make everyone else
+    wait.
+    """
+    def __init__(self, max_active=20, max_background=16,
+                 max_per_guild=10) -> None:
+        self.max_active = max_active
+        self.max_background = max_background
+        self.max_per_guild = max_per_guild
+        self.active = {cls: 0 for cls in PRIORITY_NAMES}
+        self.guild_active = Counter()
+        self._waiters = {cls: _FairQueue() for cls in PRIORITY_NAMES}
+        self._stats = {cls: _ClassStats() for cls in PRIORITY_NAMES}
+        self._guild_stats = {}
+
+    def waiting(self, cls):
+        "Number of requests of class `cls` waiting for a slot."
+        return len(self._waiters[cls])
+
+    def _can_run(self, cls, guild=None):
+        if sum(self.active.values()) >= self.max_active:
+            return False
+        if cls == BACKGROUND and self.active[cls] >= self.max_background:
+            return False
+        if (guild is not None
+                and self.guild_active[guild] >= self.max_per_guild):
+            return False
+        return True
+
+    def busy(self, guild):
+        "Whether `guild` uses more than half of the slots it may use."
+        return (guild is not None
+                and self.guild_active[guild] > self.max_per_guild // 2)
+
+    def _guild_stats_for(self, guild):
+        stats = self._guild_stats.get(guild, None)
+        if stats is None:
+            stats = _ClassStats()
+            self._guild_stats[guild] = stats
+        return stats
+
+    def _grant(self, slot):
+        self.active[slot.cls] += 1
+        self._stats[slot.cls].granted += 1
+        if slot.guild is not None:
+            self.guild_active[slot.guild] += 1
+            self._guild_stats_for(slot.guild).granted += 1
+
+    async def acquire(self, cls=None):
+        """Wait for a slot to send a request. `cls` defaults to the priority
+        of the current context, the guild is taken from the context.
+
+        Returns the `Slot` acquired, pass it to `release`.
+        """
+        if cls is None:
+            cls = current_priority.get()
+        slot = Slot(cls, current_guild.get())
+        if self._can_run(cls, slot.guild) and not any(
+                self._waiters[c] for c in PRIORITY_NAMES if c <= cls):
+            self._grant(slot)
+            return slot
+
+        fut = asyncio.get_running_loop().create_future()
+        waiters = self._waiters[cls]
+        waiters.append(slot.guild, fut)
+        stats = self._stats[cls]
+        stats.peak_waiting = max(stats.peak_waiting, len(waiters))
+        # there may be free slots others can't use because of their limits
+        self._wake()
+        started = time.perf_counter()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # slot was granted already, give it to someone else
+                self.release(slot)
+            else:
+                try:
+                    waiters.remove(slot.guild, fut)
+                except (KeyError, ValueError):
+                    pass
+            raise
+        waited = time.perf_counter() - started
+        stats.waited += waited
+        if slot.guild is not None:
+            self._guild_stats_for(slot.guild).waited += waited
+        return slot
+
+    def release(self, slot):
+        self.active[slot.cls] -= 1
+        if slot.guild is not None:
+            self.guild_active[slot.guild] -= 1
+            if not self.guild_active[slot.guild]:
+                del self.guild_active[slot.guild]
+        self._wake()
+
+    def _wake(self):
+        for cls in sorted(PRIORITY_NAMES):
+            waiters = self._waiters[cls]
+            while waiters and self._can_run(cls):
+                popped = waiters.pop(lambda g: self._can_run(cls, g))
+                if popped is None:
+                    # all waiting guilds are at their limit
+                    break
+                guild, fut = popped
+                if fut.done():
+                    continue
+                self._grant(Slot(cls, guild))
+                fut.set_result(None)
+            if waiters:
+                # don't let lower priorities overtake
+                return
+
+    def stats(self):
+        return {
+            PRIORITY_NAMES[cls]: {
+                "active": self.active[cls],
+                "waiting": len(self._waiters[cls]),
+                "peak_waiting": s.peak_waiting,
+                "granted": s.granted,
+                "waited": s.waited,
+            }
+            for cls, s in self._stats.items()
+        }
+
+    def guild_stats(self, n=None):
+        "Usage of the `n` guilds with the most requests."
+        top = sorted(self._guild_stats.items(),
+                     key=lambda item: item[1].granted, reverse=True)[:n]
+        return {
+            guild: {
+                "active": self.guild_active[guild],
+                "granted": s.granted,
+                "waited": s.waited,
+            }
+            for guild, s in top
+        }
+
+    def format(self, guilds=10):
+        "Return the queue stats and the top `guilds` as plain text."
+        lines = [
+            f"{name}: active {s['active']}, waiting {s['waiting']} "
+            f"(peak {s['peak_waiting']}), granted {s['granted']}, "
+            f"waited {s['waited']:.1f} s"
+            for name, s in self.stats().items()]
+        if guilds and self._guild_stats:
+            lines.append(f"Top guilds (of {len(self._guild_stats)})")
+            lines.extend(
+                f"  {guild}: active {s['active']}, requests {s['granted']}, "
+                f"waited {s['waited']:.1f} s"
+                for guild, s in self.guild_stats(guilds).items())
+        return "\n".join(lines)
@@ -0,0 +1,77 @@
+from collections import namedtuple
+from .utils import BASE_URL, lazy, utc_date
+
+__all__ = (
+    "Field",
+    "prefix",
+    "absolute_url",
+    "decoder",
+    "lazy_date",
+)
+
+
+Field = namedtuple("Field", ("name", "keys", "convert"), defaults=(None,))
+Field.__doc__ = """A model attribute `name` decoded from the payload.
+
+The value is the first of `keys` (a key or a tuple of keys) that's not
+`None`, or the whole payload if `keys` is `None`. `convert` is applied to
+values other than `None`, either a `prefix` or a function."""
+
+
+class prefix:
+    "Converter prepending `string` to the value, e.g. the base URL."
+    __slots__ = ("string",)
+
+    def __init__(self, string) -> None:
+        self.string = string
+
+
+# relative URLs of the API to absolute ones
+absolute_url = prefix(BASE_URL)
+
+
+def decoder(*fields):
+    """Compile `fields` into a function `decode(obj, data)` setting the
+    attributes of `obj` from the payload `data`.
+
+    The function is generated once per model, so decoding a payload is a
+    straight sequence of `dict.get` calls without looking at the fields.
+    Models that need nothing else use it as their `__init__`.
+    """
+    namespace = {}
+    lines = ["def decode(self, data):"]
+    for i, field in enumerate(fields):
+        if not field.name.isidentifier():
+            raise ValueError(f"Invalid attribute name {field.name!r}.")
+        keys = (field.keys,) if isinstance(field.keys, str) else field.keys
+        target = f"self.{field.name}"
+        if keys is None:
+            lines.append(f"    {target} = data")
+            continue
+        if len(keys) == 1 and field.convert is None:
+            lines.append(f"    {target} = data.get({keys[0]!r})")
+            continue
+        lines.append(f"    v = data.get({keys[0]!r})")
+        for key in keys[1:]:
+            lines.append("    if v is None:")
+            lines.append(f"        v = data.get({key!r})")
+        if field.convert is None:
+            lines.append(f"    {target} = v")
+        elif isinstance(field.convert, prefix):
+            namespace[f"_prefix{i}"] = field.convert.string
+            lines.append(f"    {target} = None if v is None "
+                         f"else _prefix{i} + v")
+        else:
+            namespace[f"_convert{i}"] = field.convert
+            lines.append(f"    {target} = None if v is None "
+                         f"else _convert{i}(v)")
+    exec(compile("\n".join(lines), "<vrml decoder>", "exec"), namespace)
+    return namespace["decode"]
+
+
+def lazy_date(key):
+    """Attribute with the date of the payload's `key`, parsed the first
+    time it's read. The model keeps its payload in `_data`."""
+    def decode(self):
+        return utc_date(self._data.get(key, None))
+    return lazy(decode)
@@ -0,0 +1,120 @@
+from collections import OrderedDict
+import re
+import time
+import logging
+
+__all__ = (
+    "normalize_query",
+    "SearchCache",
+)
+
+log = logging.getLogger(__name__)
+
+_ESCAPE = re.compile(r"\\(.)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(name):
+    """Normalize a search query or a name to compare it with one: Discord
+    escapes (`\\_`) are removed, whitespace is collapsed and case is
+    ignored. Only for comparing, the API gets queries as they are."""
+    name = _ESCAPE.sub(r"\1", name or "")
+    return _WHITESPACE.sub(" ", name).strip().casefold()
+
+
+class _Result:
+    __slots__ = ("data", "complete", "expires")
+
+    def __init__(self, data, complete, expires) -> None:
+        self.data = data
+        self.complete = complete
+        self.expires = expires
+
+
+class SearchCache:
+    """Cache for search results that can answer narrower searches too.
+
+    The API returns all entries whose name contains the query. So if the
+    complete result for "neon" is cached, the result for "neonx" are the
+    entries of it whose name contains "neonx", no request needed. Results
+    with `limit` or more entries may have been cut off by the API and are
+    only used for the same query.
+
+    Results are kept per `scope`, e.g. the endpoint and other query
+    params, for `ttl` seconds. At most `max_size` results are kept, least
+    recently used ones are evicted.
+    """
+    def __init__(self, ttl=600, max_size=200, limit=100,
+                 name_keys=("name",)) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.limit = limit
+        self.name_keys = name_keys
+        self._results = OrderedDict()
+        self.hits = 0
+        self.narrowed = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def name_of(self, entry):
+        "Normalized name of a search result entry."
+        for key in self.name_keys:
+            name = entry.get(key, None)
+            if name is not None:
+                return normalize_query(name)
+        return ""
+
+    def get(self, scope, query):
+        """Return the result for the normalized `query` or `None`.
+
+        The returned data is shared, copy it before modifying.
+        """
+        now = time.monotonic()
+        result = self._results.get((scope, query), None)
+        if result is not None and result.expires > now:
+            self._results.move_to_end((scope, query))
+            self.hits += 1
+            return result.data
+
+        # narrowest complete result of a query contained in this one
+        best = None
+        for (s, q), result in self._results.items():
+            if (s != scope or not result.complete or result.expires <= now
+                    or q not in query):
+                continue
+            if best is None or len(result.data) < len(best.data):
+                best = result
+        if best is None:
+            self.misses += 1
+            return None
+        self.narrowed += 1
+        data = [e for e in best.data if query in self.name_of(e)]
+        self._store(scope, query, _Result(data, True, best.expires))
+        return data
+
+    def set(self, scope, query, data):
+        "Store the result `data` of the normalized `query`."
+        if not isinstance(data, list):
+            return
+        complete = len(data) < self.limit
+        self._store(scope, query, _Result(data, complete,
+                                          time.monotonic() + self.ttl))
+
+    def _store(self, scope, query, result):
+        self._results[(scope, query)] = result
+        self._results.move_to_end((scope, query))
+        while len(self._results) > self.max_size:
+            self._results.popitem(last=False)
+
+    def clear(self):
+        self._results.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._results),
+            "hits": self.hits,
+            "narrowed": self.narrowed,
+            "misses": self.misses,
+        }
@@ -1,20 +1,27 @@
-from datetime import datetime, timezone
+from .identity import seasons
+from .schema import Field, decoder, lazy_date
 
 class Season:
-    def __init__(self, data) -> None:
-        self.id = data.get("seasonID", None)
-        self.name = data.get("seasonName", None)
-        self.is_current = data.get("isCurrent", None)
-        self.championship_url = data.get("championshipUrl", None)
+    __slots__ = (
+        "id", "name", "is_current", "championship_url", "_start",
+        "_end_date", "_championship_start", "_data"
+    )
 
-        self.start = data.get("dateStartUTC", None)
-        if self.start is not None:
-            self.start = datetime.fromisoformat(self.start + "+00:00") # timezone aware
-        self.end_date = data.get("dateEndUTC", None)
-        if self.end_date is not None:
-            self.end_date = datetime.fromisoformat(self.end_date + "+00:00") # timezone aware
-        self.championship_start = data.get("dateChampionshipStartUTC", None)
-        if self.championship_start is not None:
-            self.championship_start = datetime.fromisoformat(self.championship_start + "+00:00") # timezone aware
+    __init__ = decoder(
+        # the season's keys only if decoded by `from_data`
+        Field("_data", None),
+        Field("id", "seasonID"),
+        Field("name", "seasonName"),
+        Field("is_current", "isCurrent"),
+        Field("championship_url", "championshipUrl"),
+    )
 
+    @classmethod
+    def from_data(cls, data):
+        "Return the shared `Season` of the season in `data`."
+        return seasons.resolve(cls, data)
 
+    # timezone aware
+    start = lazy_date("dateStartUTC")
+    end_date = lazy_date("dateEndUTC")
+    championship_start = lazy_date("dateChampionshipStartUTC")
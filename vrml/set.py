@@ -1,6 +1,12 @@
+from .schema import Field, decoder
+
+
 class Set:
-    def __init__(self, data) -> None:
-        self.map = data.get("map", None)
-        self.map_id = data.get("mapID", None)
-        self.home_score = data.get("scoreHome", None)
-        self.away_score = data.get("scoreAway", None)
\ No newline at end of file
+    __slots__ = ("map", "map_id", "home_score", "away_score")
+
+    __init__ = decoder(
+        Field("map", "map"),
+        Field("map_id", "mapID"),
+        Field("home_score", "scoreHome"),
+        Field("away_score", "scoreAway"),
+    )
@@ -1,24 +1,22 @@
-from datetime import datetime
-from . import BASE_URL
+from .schema import Field, decoder, lazy_date, absolute_url
 
 class User:
-    def __init__(self, data) -> None:
-        self.id = data.get("userID", None)
-        self.name = data.get("userName", None)
-        self.logo_url = data.get("userLogo", None)
-        if self.logo_url is not None:
-            self.logo_url = BASE_URL + self.logo_url
-
-        self.country = data.get("country", None)
-        self.nationality = data.get("nationality", None)
-        self.date_joined = data.get("dateJoinedUTC", None)
-        if self.date_joined is not None:
-            aware_date = self.date_joined + "+00:00"
-            self.date_joined = datetime.fromisoformat(aware_date)
-        
-        self.stream_url = data.get("streamUrl", None)
-        self.discord_id = data.get("discordID", None)
-        self.discord_tag = data.get("discordTag", None)
-        self.is_terminated = data.get("isTerminated", None)
+    __slots__ = (
+        "id", "name", "logo_url", "country", "nationality", "_date_joined",
+        "stream_url", "discord_id", "discord_tag", "is_terminated", "_data"
+    )
 
+    __init__ = decoder(
+        Field("_data", None),
+        Field("id", "userID"),
+        Field("name", "userName"),
+        Field("logo_url", "userLogo", absolute_url),
+        Field("country", "country"),
+        Field("nationality", "nationality"),
+        Field("stream_url", "streamUrl"),
+        Field("discord_id", "discordID"),
+        Field("discord_tag", "discordTag"),
+        Field("is_terminated", "isTerminated"),
+    )
 
+    date_joined = lazy_date("dateJoinedUTC")
@@ -1,5 +1,7 @@
 
 
+from datetime import datetime
+
 BASE_URL = "https://vrmasterleague.com"
 
 short_game_names = {
@@ -16,14 +18,44 @@ short_game_names = {
     "Ultimechs": "Ultimechs"
 }
 
-def dc_escape(string: str):
-    "Return the string with all Discord message formatting characters escaped."
-    if string is None:
-        string = ""
-    return string.translate(str.maketrans({"*": "\*",
-                                           "_": "\_",
-                                           "`": "\`",
-                                           "<": "\<",
-                                           ">": "\>",
-                                           "|": "\|",
-                                           "~": "\~"}))
+
+_UNSET = object()
+
+
+class lazy:
+    """Model attribute decoded from the raw payload the first time it's
+    read, like `functools.cached_property` but for classes with
+    `__slots__`. The decoded value is kept in the slot `_<name>`, which
+    the class has to declare.
+
+        @lazy
+        def matches(self):
+            return [Match(d) for d in self._data.get("seasonMatches", [])]
+    """
+    def __init__(self, decode) -> None:
+        self.decode = decode
+        self.slot = None
+        self.__doc__ = decode.__doc__
+
+    def __set_name__(self, owner, name):
+        self.slot = "_" + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot, _UNSET)
+        if value is _UNSET:
+            value = self.decode(obj)
+            setattr(obj, self.slot, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+
+
+def utc_date(value):
+    """Return the UTC date string `value` of the API as timezone aware
+    `datetime`, `None` if there's no date."""
+    if not value or value == "TBD":
+        return None
+    return datetime.fromisoformat(value + "+00:00")